@@ -1,13 +1,20 @@
 from __future__ import absolute_import
 from collections import namedtuple
 
-import six
-
 import numpy as np
 import pandas as pd
 
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
 from .constants import NEUTRAL, GOOD, WARNING, BAD
-from .utils import ensure_dataframe
+from .utils import ensure_dataframe, StatusArray
+
+# Below this element count the numexpr setup overhead outweighs the saved
+# memory passes.
+_NUMEXPR_MIN_SIZE = 65536
 
 
 class CheckResult(namedtuple('CheckResult', ['description', 'message', 'status'])):
@@ -23,17 +30,49 @@ class CheckResult(namedtuple('CheckResult', ['description', 'message', 'status']
 
     .. attribute:: status
 
-        Scalar, :class:`~pandas.Series` or :class:`~pandas.DataFrame` containing the status
-        of each checked element
+        Scalar, :class:`~pandas.Series`, :class:`~pandas.DataFrame` or
+        :class:`~glance.utils.StatusArray` containing the status of each checked
+        element
     """
 
 
-def _setup_threshold(data, threshold):
+_is_string = np.frompyfunc(lambda x: isinstance(x, str), 1, 1)
+
+
+def _object_mask(data):
+    """
+    Find the string cells in ``data`` that must not take part in numeric comparisons.
+
+    Returns ``None`` if ``data`` only has numeric dtypes, so callers can skip building
+    aligned threshold structures entirely. For a Series with object dtype, returns a
+    boolean ndarray marking the string cells. For a DataFrame with at least one object
+    column, returns a dict mapping column name to such a mask (``None`` for numeric
+    columns).
+
+    The mask only depends on ``data``, so it can be computed once and reused for
+    several thresholds (warn + bad).
+    """
+    if isinstance(data, pd.Series):
+        if data.dtype != object:
+            return None
+        return _is_string(data.values).astype(bool)
+
+    if not (data.dtypes == object).any():
+        return None
+    return {
+        col: _is_string(data[col].values).astype(bool) if data[col].dtype == object else None
+        for col in data.columns
+    }
+
+
+def _apply_threshold(data, threshold, obj_mask):
     """
     Convert threshold to an object that can be compared by pandas.
 
-    If ``data`` is a Series, the return value will be a Series w/ identical index. If ``data`` is a DataFrame, the
-    return value will a DataFrame w/ identical index, column names and column order.
+    If ``obj_mask`` is ``None`` (purely numeric data), the threshold scalar itself is
+    returned, since pandas broadcasts scalars in comparisons without the help of an
+    aligned Series or DataFrame. Otherwise an aligned Series/DataFrame is built, w/
+    identical index (and for DataFrames, column names and column order).
 
     For object column in ``data``, strings will be converted to None since the cannot be compared numerically.
 
@@ -42,31 +81,39 @@ def _setup_threshold(data, threshold):
     :param threshold: Maximum allowed value. Values in *data*
         greater than this will be labeled as :const:`~glance.constants.BAD`
     :type threshold: scalar
+    :param obj_mask: Result of :func:`_object_mask` for ``data``
     :returns: Converted/adjusted threshold
     """
-    def _convert(series, threshold):
+    if obj_mask is None:
+        return threshold
+
+    def _convert(series, mask):
         result = pd.Series(threshold, dtype=series.dtype, index=series.index)
-        if result.dtype == object:
-            result[
-                series.apply(
-                    lambda x: isinstance(x, six.string_types)
-                )
-            ] = None
+        if mask is not None:
+            result[mask] = None
         return result
 
     if isinstance(data, pd.Series):
-        threshold = _convert(data, threshold)
-
-    elif isinstance(data, pd.DataFrame):
-        threshold = pd.DataFrame(
-            data={
-                col: _convert(data[col], threshold)
-                for col in data.columns
-            },
-            columns=data.columns,
-            index=data.index,
-        )
-    return threshold
+        return _convert(data, obj_mask)
+
+    return pd.DataFrame(
+        data={
+            col: _convert(data[col], obj_mask[col])
+            for col in data.columns
+        },
+        columns=data.columns,
+        index=data.index,
+    )
+
+
+def _setup_threshold(data, threshold):
+    """
+    Convert threshold to an object that can be compared by pandas.
+
+    Convenience wrapper around :func:`_object_mask` + :func:`_apply_threshold` for
+    callers that only need a single threshold.
+    """
+    return _apply_threshold(data, threshold, _object_mask(data))
 
 
 def below(data, threshold, warn_threshold=None):
@@ -83,37 +130,55 @@ def below(data, threshold, warn_threshold=None):
     """
     data = ensure_dataframe(data)
 
-    name = u', '.join(map(six.text_type, data.columns))
+    name = u', '.join(data.columns.astype(str))
 
-    if len(data.values[:]) == 1:
-        scalar = True
-    else:
-        scalar = False
+    scalar = data.size == 1
 
     messages = []
 
-    res = pd.DataFrame(GOOD, index=data.index, columns=data.columns, dtype=int)
-    if warn_threshold is not None:
-        res[data > _setup_threshold(data, warn_threshold)] = WARNING
-    res[data > _setup_threshold(data, threshold)] = BAD
+    obj_mask = _object_mask(data)
+
+    if obj_mask is None:
+        # purely numeric data: compare on the underlying ndarray instead of going
+        # through pandas' per-column block manager
+        arr = data.values
+        res_arr = np.full(arr.shape, GOOD, dtype=np.int8)
+        if warn_threshold is not None:
+            np.putmask(res_arr, arr > warn_threshold, WARNING)
+        np.putmask(res_arr, arr > threshold, BAD)
+        res = StatusArray(res_arr, data.index, data.columns)
+    else:
+        res = pd.DataFrame(
+            np.full((len(data.index), len(data.columns)), GOOD, dtype=np.int8),
+            index=data.index, columns=data.columns, copy=False)
+        if warn_threshold is not None:
+            res[data > _apply_threshold(data, warn_threshold, obj_mask)] = WARNING
+        res[data > _apply_threshold(data, threshold, obj_mask)] = BAD
+        res = StatusArray.from_frame(res)
 
     if scalar:
+        # single element: read the status directly, no scan needed
+        status_val = int(res.values.flat[0])
         description = u'Check if {name} is <= {threshold}.'.format(name=name, threshold=threshold)
-        if (res == BAD).values.flatten().any():
+        if status_val == BAD:
             messages.append(u'{} is too large (>{})'.format(data.values[0], threshold))
-        if (res == WARNING).values.flatten().any():
+        if status_val == WARNING:
             messages.append(u'{} is quite large (>{})'.format(data.values[0], warn_threshold))
     else:
+        # count all status values in one pass instead of re-scanning res per status
+        counts = np.bincount(res.values.ravel(), minlength=4)
         description = u'Check if all values in {name} are <= {threshold}.'.format(name=name, threshold=threshold)
 
         nall = len(res)
-        if (res == BAD).values.flatten().any():
-            nbad = int((res == BAD).values.flatten().sum())
+        if counts[BAD]:
+            nbad = int(counts[BAD])
+            # reduce over the ndarray we already hold instead of a second pandas pass
+            largest = np.nanmax(arr) if obj_mask is None else data.max()
             messages.append(
                 u'{n:d} of {nall:d} values ({perc:f}%) are above {thresh} (largest value: {max})'.format(
-                    n=nbad, nall=nall, perc=100.0 * nbad / nall, thresh=threshold, max=data.max()))
-        if (res == WARNING).values.flatten().any():
-            nwarn = (res == WARNING).values.flatten().sum()
+                    n=nbad, nall=nall, perc=100.0 * nbad / nall, thresh=threshold, max=largest))
+        if counts[WARNING]:
+            nwarn = int(counts[WARNING])
             messages.append(u'{n} of {nall} values ({perc:f}%) are quite large (>{thresh})'.format(
                 n=nwarn, nall=nall, perc=100.0 * nwarn / nall, thresh=warn_threshold))
 
@@ -134,37 +199,50 @@ def above(data, threshold, warn_threshold=None):
     """
     data = ensure_dataframe(data)
 
-    name = u', '.join(map(six.text_type, data.columns))
+    name = u', '.join(data.columns.astype(str))
 
-    if len(data.values[:]) == 1:
-        scalar = True
-    else:
-        scalar = False
+    scalar = data.size == 1
 
     messages = []
 
-    res = pd.DataFrame(GOOD, index=data.index, columns=data.columns, dtype=int)
-    if warn_threshold is not None:
-        res[data < _setup_threshold(data, warn_threshold)] = WARNING
-    res[data < _setup_threshold(data, threshold)] = BAD
+    obj_mask = _object_mask(data)
+
+    if obj_mask is None:
+        arr = data.values
+        res_arr = np.full(arr.shape, GOOD, dtype=np.int8)
+        if warn_threshold is not None:
+            np.putmask(res_arr, arr < warn_threshold, WARNING)
+        np.putmask(res_arr, arr < threshold, BAD)
+        res = StatusArray(res_arr, data.index, data.columns)
+    else:
+        res = pd.DataFrame(
+            np.full((len(data.index), len(data.columns)), GOOD, dtype=np.int8),
+            index=data.index, columns=data.columns, copy=False)
+        if warn_threshold is not None:
+            res[data < _apply_threshold(data, warn_threshold, obj_mask)] = WARNING
+        res[data < _apply_threshold(data, threshold, obj_mask)] = BAD
+        res = StatusArray.from_frame(res)
 
     if scalar:
+        status_val = int(res.values.flat[0])
         description = u'Check if {name} is >= {threshold}.'.format(name=name, threshold=threshold)
-        if (res == BAD).values.flatten().any():
+        if status_val == BAD:
             messages.append(u'{} is too small (<{})'.format(data.values[0], threshold))
-        if (res == WARNING).values.flatten().any():
+        if status_val == WARNING:
             messages.append(u'{} is quite small (<{})'.format(data.values[0], warn_threshold))
     else:
+        counts = np.bincount(res.values.ravel(), minlength=4)
         description = u'Check if all values in {name} are >= {threshold}.'.format(name=name, threshold=threshold)
         nall = len(res)
-        if (res == BAD).values.flatten().any():
-            nbad = int((res == BAD).values.flatten().sum())
+        if counts[BAD]:
+            nbad = int(counts[BAD])
+            smallest = np.nanmin(arr) if obj_mask is None else data.min()
             messages.append(
                 u'{n:d} of {nall:d} values ({perc:f}%) are below {thresh} (smallest value: {min})'.format(
                     n=nbad, nall=nall, perc=100.0 * nbad / nall, thresh=threshold,
-                    min=data.min()))
-        if (res == WARNING).values.flatten().any():
-            nwarn = (res == WARNING).values.flatten().sum()
+                    min=smallest))
+        if counts[WARNING]:
+            nwarn = int(counts[WARNING])
             messages.append(
                 u'{n} of {nall} values ({perc:f}%) are quite small (<{thresh})'.format(
                     n=nwarn, nall=nall, perc=100.0 * nwarn / nall, thresh=warn_threshold))
@@ -184,29 +262,79 @@ def all_equal(data, value=True):
     """
     data = ensure_dataframe(data)
 
-    name = u', '.join(map(six.text_type, data.columns))
+    name = u', '.join(data.columns.astype(str))
 
-    if len(data.values[:]) == 1:
-        scalar = True
-    else:
-        scalar = False
+    scalar = data.size == 1
 
     messages = []
 
-    res = pd.DataFrame(GOOD, index=data.index, columns=data.columns, dtype=int)
-    res[data != _setup_threshold(data, value)] = BAD
+    if all(isinstance(dt, pd.CategoricalDtype) or dt == bool for dt in data.dtypes):
+        # categorical columns compare far faster on their integer codes, and
+        # bool columns on the raw bool buffer, than via the object fallback
+        res_arr = np.full((len(data.index), len(data.columns)), GOOD, dtype=np.int8)
+        for i, col in enumerate(data.columns):
+            series = data[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                categories = series.cat.categories
+                if value in categories:
+                    mismatch = series.cat.codes.values != categories.get_loc(value)
+                else:
+                    mismatch = np.ones(len(series), dtype=bool)
+            else:
+                mismatch = np.logical_xor(series.values, bool(value))
+            res_arr[mismatch, i] = BAD
+        res = StatusArray(res_arr, data.index, data.columns)
+    else:
+        obj_mask = _object_mask(data)
+        if obj_mask is None:
+            arr = data.values
+            res_arr = np.full(arr.shape, GOOD, dtype=np.int8)
+            np.putmask(res_arr, arr != value, BAD)
+            res = StatusArray(res_arr, data.index, data.columns)
+        else:
+            res = pd.DataFrame(
+                np.full((len(data.index), len(data.columns)), GOOD, dtype=np.int8),
+                index=data.index, columns=data.columns, copy=False)
+            res[data != _apply_threshold(data, value, obj_mask)] = BAD
+            res = StatusArray.from_frame(res)
 
     if scalar:
+        status_val = int(res.values.flat[0])
         description = u'Check if {name} == {value}.'.format(name=name, value=value)
-        if (res == BAD).values.flatten().any():
+        if status_val == BAD:
             messages.append(u'{} is not == {}'.format(data.values[0], value))
     else:
+        counts = np.bincount(res.values.ravel(), minlength=4)
         description = u'Check if all values in {name} are == {value}.'.format(name=name, value=value)
-        if (res == BAD).values.flatten().any():
+        if counts[BAD]:
             messages.append(u'Some values are not == {}'.format(value))
     return CheckResult(description, u'\n'.join(messages), res)
 
 
+def _inrange_numexpr(arr, lower, upper, lower_warn, upper_warn):
+    """Evaluate the range-check statuses for a numeric ndarray in one numexpr pass.
+
+    Builds a nested ``where(...)`` expression so that the later (BAD) assignments
+    of :func:`inrange` take precedence, and reads ``arr`` only once instead of
+    once per threshold."""
+    expr = 'GOOD'
+    if lower_warn is not None:
+        expr = 'where(arr < lower_warn, WARNING, {})'.format(expr)
+    if upper_warn is not None:
+        expr = 'where(arr > upper_warn, WARNING, {})'.format(expr)
+    if lower is not None:
+        expr = 'where(arr < lower, BAD, {})'.format(expr)
+    if upper is not None:
+        expr = 'where(arr > upper, BAD, {})'.format(expr)
+    local_dict = {
+        'arr': arr,
+        'lower': lower, 'upper': upper,
+        'lower_warn': lower_warn, 'upper_warn': upper_warn,
+        'GOOD': GOOD, 'WARNING': WARNING, 'BAD': BAD,
+    }
+    return numexpr.evaluate(expr, local_dict=local_dict).astype(np.int8, copy=False)
+
+
 def inrange(data, lower=None, upper=None, lower_warn=None, upper_warn=None):
     """Check if all elements are within a given range
 
@@ -233,36 +361,57 @@ def inrange(data, lower=None, upper=None, lower_warn=None, upper_warn=None):
 
     data = ensure_dataframe(data)
 
-    name = u', '.join(map(six.text_type, data.columns))
+    name = u', '.join(data.columns.astype(str))
 
-    if len(data.values[:]) == 1:
-        scalar = True
-    else:
-        scalar = False
+    scalar = data.size == 1
 
     messages = []
 
-    res = pd.DataFrame(GOOD, index=data.index, columns=data.columns, dtype=int)
-    if lower_warn is not None:
-        res[data < _setup_threshold(data, lower_warn)] = WARNING
-    if upper_warn is not None:
-        res[data > _setup_threshold(data, upper_warn)] = WARNING
-    if lower is not None:
-        res[data < _setup_threshold(data, lower)] = BAD
-    if upper is not None:
-        res[data > _setup_threshold(data, upper)] = BAD
+    obj_mask = _object_mask(data)
+
+    if obj_mask is None:
+        arr = data.values
+        if numexpr is not None and arr.size >= _NUMEXPR_MIN_SIZE and arr.dtype.kind in 'fiu':
+            # fuse the up-to-four comparisons into a single pass over arr
+            res_arr = _inrange_numexpr(arr, lower, upper, lower_warn, upper_warn)
+        else:
+            res_arr = np.full(arr.shape, GOOD, dtype=np.int8)
+            if lower_warn is not None:
+                np.putmask(res_arr, arr < lower_warn, WARNING)
+            if upper_warn is not None:
+                np.putmask(res_arr, arr > upper_warn, WARNING)
+            if lower is not None:
+                np.putmask(res_arr, arr < lower, BAD)
+            if upper is not None:
+                np.putmask(res_arr, arr > upper, BAD)
+        res = StatusArray(res_arr, data.index, data.columns)
+    else:
+        res = pd.DataFrame(
+            np.full((len(data.index), len(data.columns)), GOOD, dtype=np.int8),
+            index=data.index, columns=data.columns, copy=False)
+        if lower_warn is not None:
+            res[data < _apply_threshold(data, lower_warn, obj_mask)] = WARNING
+        if upper_warn is not None:
+            res[data > _apply_threshold(data, upper_warn, obj_mask)] = WARNING
+        if lower is not None:
+            res[data < _apply_threshold(data, lower, obj_mask)] = BAD
+        if upper is not None:
+            res[data > _apply_threshold(data, upper, obj_mask)] = BAD
+        res = StatusArray.from_frame(res)
 
     if scalar:
+        status_val = int(res.values.flat[0])
         description = u'Check if {} is in the range [{}, {}].'.format(name, lower, upper)
-        if (res == BAD).values.flatten().any():
+        if status_val == BAD:
             messages.append(u'{} is outside of the range [{}, {}]'.format(data.values[0], lower, upper))
-        if (res == WARNING).values.flatten().any():
+        if status_val == WARNING:
             messages.append(u'{} is quite extreme (<{} or >{})'.format(data.values[0], lower_warn, upper_warn))
     else:
+        counts = np.bincount(res.values.ravel(), minlength=4)
         description = u'Check if all values for {} are in the range [{}, {}].'.format(name, lower, upper)
-        if (res == BAD).values.flatten().any():
+        if counts[BAD]:
             messages.append(u'Some values are outside of the range [{}, {}]'.format(lower, upper))
-        if (res == WARNING).values.flatten().any():
+        if counts[WARNING]:
             messages.append(u'Some values are in range, but might require attention (<{} or >{})'.format(lower_warn, upper_warn))
     return CheckResult(description, u'\n'.join(messages), res)
 
@@ -280,19 +429,28 @@ def monotonous(data, strict=False):
     strictly = u' strictly' if strict else u''
     description = u'Check if the values in {} rise/fall{} monotonously'.format(data.name, strictly)
 
-    res = pd.Series(GOOD, index=data.index, dtype=int)
-    res.iloc[0] = NEUTRAL
+    values = data.values.astype(np.float64, copy=False)
+    n = len(values)
+
+    res_arr = np.full(n, GOOD, dtype=np.int8)
+    res_arr[0] = NEUTRAL
 
-    direction = pd.Series(np.sign(data.diff()), index=data.index)
+    # sign of the step leading up to each element; NaN where undefined
+    direction = np.empty(n, dtype=np.float64)
+    direction[0] = np.nan
+    direction[1:] = np.sign(values[1:] - values[:-1])
     if not strict:
+        # carry the last non-zero direction over plateaus (vectorized ffill)
         direction[direction == 0] = np.nan
-        direction.ffill(inplace=True)
-    dirchange = pd.Series(np.sign(direction.diff()), index=data.index)
-    bad = dirchange.fillna(0) != 0
+        valid = ~np.isnan(direction)
+        direction = direction[np.maximum.accumulate(np.where(valid, np.arange(n), 0))]
+    dirchange = np.sign(direction[1:] - direction[:-1])
+    bad = np.nan_to_num(dirchange) != 0  # NaN means no established direction, not a flip
 
-    res[bad] = BAD
+    res_arr[1:][bad] = BAD
+    res = pd.Series(res_arr, index=data.index, copy=False)
 
-    if (res == BAD).values.flatten().any():
+    if bad.any():
         message = u'{} is not{} monotonous in some places'.format(data.name, strictly)
     else:
         message = u''
@@ -315,10 +473,11 @@ def ratio_range(data, lower, upper, lower_warn=None, upper_warn=None):
     :return: Results of the check
     :rtype: :class:`~CheckResult`
     """
-    values = data.astype(float).values
-    sratio = pd.Series(index=data.index, name=u'Successive ratios of {}'.format(data.name))
-    sratio.iloc[0] = 1
-    sratio.iloc[1:] = np.divide(values[1:], values[:-1])
+    values = data.values.astype(np.float64, copy=False)
+    ratios = np.empty_like(values)
+    ratios[0] = 1.0
+    np.divide(values[1:], values[:-1], out=ratios[1:])
+    sratio = pd.Series(ratios, index=data.index, name=u'Successive ratios of {}'.format(data.name), copy=False)
 
     res = inrange(sratio, lower=lower, upper=upper, lower_warn=lower_warn, upper_warn=upper_warn)
     description = (u'Check if the successive ratios of elements in {} '
@@ -356,38 +515,45 @@ def n_outside_range(data, lower, upper,
     """
 
     data = ensure_dataframe(data)
-    name = u', '.join(map(six.text_type, data.columns))
+    name = u', '.join(data.columns.astype(str))
 
     messages = []
 
     # evaluation
-    res = pd.DataFrame(GOOD, index=data.index, columns=data.columns, dtype=int)
-    # the number thresholds can reduce the status from BAD if the entries is within the n leading ones
-    for col in data.columns:
-        # too large values
-        too_large = data[col] > upper
-        n_too_large = too_large.sum()
-        if n_too_large > n_upper_bad:
-            res.loc[too_large] = BAD
-        elif n_upper_warn is not None and n_too_large > n_upper_warn:
-            res.loc[too_large] = WARNING
-
-        # too low values
-        too_low = data[col] < lower
-        n_too_low = too_low.sum()
-        if n_too_low > n_lower_bad:
-            res.loc[too_low] = BAD
-        elif n_lower_warn is not None and n_too_low > n_lower_warn:
-            res.loc[too_low] = WARNING
-
-    # nan values are not detected
-    res[pd.isnull(data)] = NEUTRAL
+    arr = data.values
+    res_arr = np.full(arr.shape, GOOD, dtype=np.int8)
+    # the number thresholds can reduce the status from BAD if the entries is within the n leading ones.
+    # One 2-D compare per bound; the per-column counts decide which columns get flagged.
+    too_large = arr > upper
+    too_low = arr < lower
+    n_too_large = too_large.sum(axis=0)
+    n_too_low = too_low.sum(axis=0)
+
+    # too large values
+    if n_upper_warn is not None:
+        np.putmask(res_arr, too_large & (n_too_large > n_upper_warn), WARNING)
+    np.putmask(res_arr, too_large & (n_too_large > n_upper_bad), BAD)
+
+    # too low values
+    if n_lower_warn is not None:
+        np.putmask(res_arr, too_low & (n_too_low > n_lower_warn), WARNING)
+    np.putmask(res_arr, too_low & (n_too_low > n_lower_bad), BAD)
+
+    # nan values are not detected; integer/bool arrays can't hold NaN,
+    # so the pass is skipped entirely for them
+    if arr.dtype.kind == 'f':
+        res_arr[np.isnan(arr)] = NEUTRAL
+    elif arr.dtype.kind not in 'iub':
+        res_arr[pd.isnull(data).values] = NEUTRAL
+    res = StatusArray(res_arr, data.index, data.columns)
+
+    counts = np.bincount(res.values.ravel(), minlength=4)
 
     description = u'Check that not too many values for {} are outside range [{}, {}].'.format(name, lower, upper)
-    if (res == BAD).values.flatten().any():
+    if counts[BAD]:
         messages.append(u'Too many values outside range: n(<{}) > {} or n(>{}) > {}'.format(
             lower, n_lower_bad, upper, n_upper_bad))
-    elif (res == WARNING).values.flatten().any():
+    elif counts[WARNING]:
         messages.append(u'Some values outside range: {} > n(<{}) > {} or {} > n(>{}) > {}'
                         u''.format(n_lower_bad, lower, n_lower_warn, n_upper_bad, upper, n_upper_warn))
     return CheckResult(description, u'\n'.join(messages), res)
@@ -4,7 +4,11 @@
 from __future__ import (absolute_import, division, print_function)
 
 import re
-from fnmatch import fnmatch
+from fnmatch import translate
+from functools import lru_cache
+
+import numpy as np
+
 from glance.core.compat import string_types
 
 
@@ -21,31 +25,74 @@ def popdefault(l, index=-1, default=None):
         return default
 
 
+@lru_cache(maxsize=1024)
+def _compiled_fnmatch(pattern):
+    """Translate and compile an fnmatch pattern once per distinct pattern."""
+    return re.compile(translate(pattern.lower()))
+
+
+@lru_cache(maxsize=1024)
+def _compiled_re(pattern):
+    return re.compile(pattern)
+
+
 def title_fnmatch(s, pattern):
     try:
-        return fnmatch(s.lower(), pattern.lower())
+        return _compiled_fnmatch(pattern).match(s.lower()) is not None
     except AttributeError:
         return True
 
 
 def title_re_match(s, pattern):
     if isinstance(s, string_types) and isinstance(pattern, string_types):
-        return re.search(pattern, s) is not None
+        return _compiled_re(pattern).search(s) is not None
     else:
         return True
 
 
+def _prepare_matcher(pattern, match_func):
+    """Bind ``pattern`` into a one-argument title predicate.
+
+    For the two built-in matchers the pattern is compiled exactly once here,
+    so the per-title loop does not pay the cache lookup (or the repeated
+    ``pattern.lower()``) for every element."""
+    if match_func is title_fnmatch:
+        compiled = _compiled_fnmatch(pattern)
+
+        def predicate(title):
+            try:
+                return compiled.match(title.lower()) is not None
+            except AttributeError:
+                return True
+        return predicate
+    if match_func is title_re_match:
+        if not isinstance(pattern, string_types):
+            return lambda title: True
+        compiled = _compiled_re(pattern)
+        return lambda title: (compiled.search(title) is not None
+                              if isinstance(title, string_types) else True)
+    return lambda title: match_func(title, pattern)
+
+
+def _matching(elements, pattern, match_func):
+    """Filter ``elements`` down to those whose title matches ``pattern``.
+
+    The titles are collected into one object array and matched in a single
+    sweep, so each tree level is one mask operation instead of a test nested
+    inside the parent loop."""
+    predicate = _prepare_matcher(pattern, match_func)
+    titles = np.array([el.title for el in elements], dtype=object)
+    mask = np.fromiter(
+        (bool(predicate(title)) for title in titles),
+        dtype=bool, count=len(titles))
+    return [el for el, ok in zip(elements, mask) if ok]
+
+
 def find_in_report(rep, pattern, default_pattern, match_func):
     parts = pattern.split('/')
     secpat = popdefault(parts, 0, default_pattern)
     blkpat = popdefault(parts, 0, default_pattern)
     respat = popdefault(parts, 0, default_pattern)
-    results = []
-    for sec in rep:
-        if match_func(sec.title, secpat):
-            for blk in sec:
-                if match_func(blk.title, blkpat):
-                    for res in blk:
-                        if match_func(res.title, respat):
-                            results.append(res)
-    return results
+    sections = _matching(list(rep), secpat, match_func)
+    blocks = _matching([blk for sec in sections for blk in sec], blkpat, match_func)
+    return _matching([res for blk in blocks for res in blk], respat, match_func)
@@ -4,8 +4,14 @@ parameters in all top-level functions in yaml (load(), safe_load(), ...) with th
 libyaml-based versions (CLoader, CDumper), if libyaml is available."""
 
 from __future__ import absolute_import
+import inspect
+
 import yaml
 
+# The top-level entry points whose Loader/Dumper defaults we want to rewrite.
+_YAML_FUNCTIONS = ('load', 'load_all', 'safe_load', 'safe_load_all',
+                   'dump', 'dump_all', 'safe_dump', 'safe_dump_all')
+
 if yaml.__with_libyaml__:
     # Monkeypatching
     yaml.Loader = yaml.CLoader
@@ -24,6 +30,10 @@ if yaml.__with_libyaml__:
         yaml.dumper.SafeDumper: yaml.CSafeDumper,
     }
 
-    for obj in yaml.__dict__.values():
-        if getattr(obj, 'func_defaults', None) is not None:
+    # Probing 'func_defaults' was a Python-2 leftover that made this loop a
+    # silent no-op on Python 3; check '__defaults__' and only touch the known
+    # top-level functions.
+    for name in _YAML_FUNCTIONS:
+        obj = getattr(yaml, name, None)
+        if inspect.isfunction(obj) and obj.__defaults__ is not None:
             obj.__defaults__ = tuple(repl.get(_, _) for _ in obj.__defaults__)
@@ -1,23 +1,45 @@
 # coding=utf-8
 
 from __future__ import absolute_import
-import codecs
+import secrets
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import (timedelta, datetime)
 import functools
-import itertools
 import json
 import collections
+import contextvars
 import os
 import os.path
 import logging
+import struct
+import tempfile
 import threading
+import time
 import sys
 import warnings
 from io import StringIO
 
 import yaml
 from yaml import YAMLError
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.csv
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+import numpy as np
 import pandas
 import debtcollector as dc
 from debtcollector.removals import removed_kwarg
@@ -43,22 +65,216 @@ __all__ = ['Report', 'Section', 'Block', 'TextResult', 'TableResult',
 
 
 tagged_serializables = {}
+# attributes set externally (element ids, loaded resources) that must not be
+# serialized
+_RESERVED = frozenset(('_id', '_secid', '_blkid', '_resid', '_resources'))
+# inverse mapping (class -> tag), maintained by the tagged() decorator so
+# to_tagged() does not have to rebuild it for every serialized result
+_class_to_tag = {}
 plugin_template_paths = []
 plugin_static_paths = {}
 plugin_static_links = []
 
 log = logging.getLogger(__name__)
 
-_ctx = threading.local()
+# Version of the format currently being read; contextvar reads are a single C
+# lookup, unlike the threading.local descriptor + lazy-init branch used before
+_file_format = contextvars.ContextVar('current_file_format', default=None)
+
+
+class _FormatContext(object):
+    """Mutable view onto :data:`_file_format`, kept for callers of
+    :func:`get_context`."""
+
+    @property
+    def current_file_format(self):
+        return _file_format.get()
+
+    @current_file_format.setter
+    def current_file_format(self, value):
+        _file_format.set(value)
+
+
+_ctx = _FormatContext()
 
 
 def get_context():
-    if not getattr(_ctx, '_is_initialized', False):
-        _ctx.current_file_format = None  # Version of the format currently being read
-        _ctx._is_initialized = True
     return _ctx
 
 
+_RESOURCE_MAGIC = b'glance-res5\n'
+
+# small-int string cache for building element ids without per-element
+# map/join allocations
+_SMALL_INT_STR = tuple(str(i) for i in range(1024))
+
+
+def _int_str(i):
+    return _SMALL_INT_STR[i] if i < 1024 else str(i)
+
+
+# color palette cycled over the columns of a PlotResult
+_PLOT_COLORS = ('crimson', 'dodgerblue', 'forestgreen', 'goldenrod', 'hotpink',
+                'lightseagreen', 'lightslategray')
+
+# marker for DataFrames stored as Arrow IPC inside the resources pickle
+_ARROW_TAG = '__glance-arrow-ipc__'
+
+
+def _serialize_df(df):
+    """Write a DataFrame as an Arrow IPC stream and return the bytes."""
+    table = pyarrow.Table.from_pandas(df, preserve_index=True)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _deserialize_df(data):
+    """Rebuild a DataFrame from the bytes written by :func:`_serialize_df`."""
+    with pyarrow.ipc.open_stream(pyarrow.py_buffer(data)) as reader:
+        return reader.read_pandas()
+
+
+def _pack_value(value):
+    """Swap a DataFrame for its Arrow IPC form where pyarrow can handle it.
+
+    Frames Arrow cannot represent (exotic object columns) stay as they are and
+    go through pickle like before.
+    """
+    if pyarrow is None or not isinstance(value, pandas.DataFrame):
+        return value
+    try:
+        return (_ARROW_TAG, _serialize_df(value))
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError, TypeError, ValueError):
+        return value
+
+
+def _unpack_value(value):
+    if isinstance(value, tuple) and len(value) == 2 and value[0] == _ARROW_TAG:
+        if pyarrow is None:
+            raise ImportError('pyarrow is required to read this report')
+        return _deserialize_df(value[1])
+    return value
+
+
+def _dumps_resources(resources):
+    """Pickle the resources dict for storage.
+
+    On Python 3 this uses pickle protocol 5 with out-of-band buffers
+    (:pep:`574`), so large ndarrays and byte blobs are written as raw frames
+    instead of being copied into the pickle stream. The result is a small
+    container: a magic marker, the length-prefixed pickle header, then the
+    length-prefixed raw buffers.
+    """
+    if PY2:
+        return pickle.dumps(resources, protocol=2)
+    if pyarrow is not None:
+        resources = {
+            key: {attr: _pack_value(value) for attr, value in data.items()}
+            for key, data in resources.items()
+        }
+    buffers = []
+    head = pickle.dumps(resources, protocol=5, buffer_callback=buffers.append)
+    parts = [_RESOURCE_MAGIC, struct.pack('<Q', len(head)), head]
+    for buf in buffers:
+        raw = buf.raw()
+        parts.append(struct.pack('<Q', raw.nbytes))
+        parts.append(raw)
+    return b''.join(parts)
+
+
+def _loads_resources(blob):
+    """Inverse of :func:`_dumps_resources`.
+
+    Blobs without the magic marker were written by older glance versions as a
+    plain protocol-2 pickle and are read the old way.
+    """
+    if not blob.startswith(_RESOURCE_MAGIC):
+        if blob[:1] == b'\x80':
+            # plain pickle written by older glance versions: skip the
+            # pandas.read_pickle compat layer and its BytesIO wrapper
+            try:
+                return pickle.loads(blob)
+            except UnicodeDecodeError:
+                # py2-written protocol-2 pickles also start with \x80 but
+                # need pandas' latin-1 retry
+                pass
+        # anything else (very old or oddly encoded payloads) keeps the
+        # tolerant pandas reader
+        return pandas.read_pickle(BytesIO(blob), compression=None)
+    view = memoryview(blob)
+    offset = len(_RESOURCE_MAGIC)
+    (headlen,) = struct.unpack_from('<Q', view, offset)
+    offset += 8
+    head = view[offset:offset + headlen]
+    offset += headlen
+    buffers = []
+    while offset < len(view):
+        (buflen,) = struct.unpack_from('<Q', view, offset)
+        offset += 8
+        buffers.append(view[offset:offset + buflen])
+        offset += buflen
+    resources = pickle.loads(head, buffers=buffers)
+    return {
+        key: {attr: _unpack_value(value) for attr, value in data.items()}
+        for key, data in resources.items()
+    }
+
+
+def _export_csv(df):
+    """CSV-format a DataFrame as utf-8 bytes.
+
+    Uses pyarrow's C CSV writer when available; otherwise falls back to
+    pandas' Python-level formatter."""
+    if pyarrow is not None:
+        try:
+            table = pyarrow.Table.from_pandas(df, preserve_index=False)
+            buf = BytesIO()
+            pyarrow.csv.write_csv(table, buf)
+            return buf.getvalue()
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError, TypeError, ValueError):
+            pass
+    data = df.to_csv(index=False, encoding='utf8')
+    if not isinstance(data, six.binary_type):
+        data = data.encode('utf8')
+    return data
+
+
+def _json_dumps(obj):
+    """Encode one object as JSON bytes, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2)
+    out = json.dumps(obj, sort_keys=True, indent=4, separators=(',', ': '))
+    return out if PY2 else out.encode('utf-8')
+
+
+def _write_report_json(fileobj, header, native):
+    """Write ``[header, native]`` as JSON into ``fileobj`` chunk by chunk.
+
+    The sections are encoded one at a time, so the peak allocation is the
+    largest section instead of the whole serialized report."""
+    fileobj.write(b'[\n')
+    fileobj.write(_json_dumps(header))
+    fileobj.write(b',\n{')
+    first = True
+    for key in sorted(native):
+        if key == 'sections':
+            continue
+        if not first:
+            fileobj.write(b',\n')
+        first = False
+        fileobj.write(_json_dumps(key) + b': ' + _json_dumps(native[key]))
+    if not first:
+        fileobj.write(b',\n')
+    fileobj.write(b'"sections": [')
+    for isec, secdict in enumerate(native.get('sections', ())):
+        if isec:
+            fileobj.write(b',\n')
+        fileobj.write(_json_dumps(secdict))
+    fileobj.write(b']}\n]')
+
+
 def tagged(cls):
     """Class decorator. Register a class to be serialized with a tag.
 
@@ -74,6 +290,7 @@ def tagged(cls):
     cls.type = tag
     if not tag in tagged_serializables:
         tagged_serializables[tag] = cls
+    _class_to_tag[cls] = tag
     return cls
 
 
@@ -83,13 +300,13 @@ def to_tagged(obj):
     The class of the object needs to be registered in the module variable
     tagged_serializables.
     """
-    tagged_classes = dict([(value, key) for key, value in tagged_serializables.items()])
-    if obj.__class__ not in tagged_classes:
+    tag = _class_to_tag.get(obj.__class__)
+    if tag is None:
         errmsg = 'Class {} is not installed/registered as a glance result type plugin.'
         errmsg = errmsg.format(obj.__class__.__name__)
         log.error(errmsg)
         raise KeyError(errmsg)
-    return tagged_classes[obj.__class__], obj.to_dict()
+    return tag, obj.to_dict()
 
 
 def from_tagged(s):
@@ -152,11 +369,15 @@ class Serializable(object):
         return d
 
     def to_dict(self):
-        fixed = self.fix_dict(self.__dict__.copy())
-        # remove keys that are added externally
-        for key in ['_id', '_secid', '_blkid', '_resid', '_resources']:
-            fixed.pop(key, None)
-        return fixed
+        return self._to_dict_into({})
+
+    def _to_dict_into(self, out):
+        """Serialize this element directly into the caller-supplied dict
+        ``out``, filtering the externally added keys in the same pass."""
+        for key, value in self.__dict__.items():
+            if key not in _RESERVED:
+                out[key] = value
+        return self.fix_dict(out)
 
     def _get_externals(self, storage=None):
         if storage is not None:
@@ -168,7 +389,7 @@ class Serializable(object):
             # If this method has been called before, return the same values again
             if getattr(self, '_external', None) is not None:
                 return self._external, data
-            key = codecs.encode(os.urandom(4), 'hex').decode('utf8')
+            key = secrets.token_hex(4)
             self._external = key
             return key, data
 
@@ -188,8 +409,18 @@ class Serializable(object):
             for child in getattr(self, self.children_attr):
                 yield child
                 if isinstance(child, Serializable):
-                    for grandchild in child.iter_children():
-                        yield grandchild
+                    yield from child.iter_children()
+
+    def _walk(self, out):
+        """Append all descendants depth-first to the list ``out``.
+
+        Non-generator twin of :meth:`iter_children` for hot paths that want
+        the whole flat list anyway, without per-level generator frames."""
+        if self.children_attr:
+            for child in getattr(self, self.children_attr):
+                out.append(child)
+                if isinstance(child, Serializable):
+                    child._walk(out)
 
 
 class BaseResult(Serializable):
@@ -252,12 +483,14 @@ class TableResult(BaseResult):
         self.allow_data_export = allow_data_export
         self.features = features if features is not None else 'all'
         if data is not None:
-            for colname, col in data.iteritems():
-                col = col.copy()
-                if col.dtype == 'O':  # potentially a str
-                    for ind, v in col.iteritems():
-                        if type(v) == binary_type:
-                            col[ind] = v.decode('utf8')
+            # decode bytes cells per column with one vectorized pass instead of
+            # a Python loop over every cell
+            for colname in data.columns[data.dtypes == object]:
+                col = data[colname]
+                mask = col.map(type).eq(binary_type)
+                if mask.any():
+                    col = col.copy()
+                    col[mask] = col[mask].str.decode('utf8')
                     data[colname] = col
         self.data = data
 
@@ -265,24 +498,21 @@ class TableResult(BaseResult):
     @staticmethod
     def unfix_dict(d):
         d.pop('status', None)
-        ctx = get_context()
-        if ctx.current_file_format == 1:
+        version = _file_format.get()
+        if version == 1:
             d['data'] = pandas.DataFrame(**fix_multiindices(d['data']))
-        elif ctx.current_file_format == 0:
+        elif version == 0:
             d['data'] = pandas.DataFrame.from_dict(d['data'])
         if d.get('statustable') is not None:
-            if ctx.current_file_format == 1:
+            if version == 1:
                 d['statustable'] = pandas.DataFrame(**fix_multiindices(d['statustable']))
-            elif ctx.current_file_format == 0:
+            elif version == 0:
                 d['statustable'] = pandas.DataFrame.from_dict(d['statustable'])
         return d
 
     def export_data(self):
         # returns the csv-formatted data, as binary string
-        data = self.data.to_csv(index=False, encoding='utf8')
-        if not isinstance(data, six.binary_type):
-            data = data.encode('utf8')
-        return data
+        return _export_csv(self.data)
 
 
 @tagged
@@ -303,10 +533,12 @@ class ImageResult(BaseResult):
         self.title = title
         self.key = key
 
-        ctx = get_context()
+        version = _file_format.get()
 
         self._pre3 = False
-        if (ctx.current_file_format is not None) and (ctx.current_file_format < 3):
+        self._data = None
+        self._source = None
+        if (version is not None) and (version < 3):
             self._pre3 = True
             self.file = file
             return
@@ -314,9 +546,10 @@ class ImageResult(BaseResult):
         # file can be one of several kinds of objects:
         # 1. The name of a file in the local file system:
         if isinstance(file, compat.string_types):
-            fh = open(file, mode='rb')
+            # remember the path and read lazily on first access, so reports
+            # that are never stored don't hold all images in memory
             self.filename = slugify(filename or os.path.basename(file))
-            self.data = fh.read()
+            self._source = file
         # 2. A matplotlib figure handle:
         elif hasattr(file, 'savefig'):  # just check if the method is there
             imgdata = BytesIO()
@@ -339,6 +572,19 @@ class ImageResult(BaseResult):
         else:
             self.filename = slugify(filename)
 
+    @property
+    def data(self):
+        if self._data is None and self._source is not None:
+            with open(self._source, mode='rb') as fh:
+                self._data = fh.read()
+            self._source = None
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self._source = None
+
     def _load_externals(self, resources):
         # once we stop supporting pre-v3 data, this method can go. It is just there to
         # passivate the method for pre-v3 data
@@ -353,6 +599,9 @@ class ImageResult(BaseResult):
     def fix_dict(self, d):
         d = super(ImageResult, self).fix_dict(d)
         d.pop('_pre3', None)
+        # internal attributes backing the lazy data property
+        d.pop('_data', None)
+        d.pop('_source', None)
         return d
 
     def open(self, storage, reportid, runid):
@@ -384,11 +633,11 @@ class PlotResult(BaseResult):
     # This method is only needed for reading reports generated with glance<=0.7.2
     @staticmethod
     def unfix_dict(d):
-        ctx = get_context()
+        version = _file_format.get()
 
-        if ctx.current_file_format == 1:
+        if version == 1:
             d['data'] = pandas.DataFrame(**d['data'])
-        elif ctx.current_file_format == 0:
+        elif version == 0:
             d['data'] = pandas.DataFrame.from_dict(d['data'])
         return d
 
@@ -409,16 +658,13 @@ class PlotResult(BaseResult):
         )
         p.sizing_mode = 'scale_width'
 
-        css_color_names = 'crimson dodgerblue forestgreen goldenrod hotpink lightseagreen lightslategray'
-        colors = itertools.cycle(col for col in css_color_names.split())
-
-        for col in self.data:
+        for icol, col in enumerate(self.data):
             s = self.data[col]
             p.line(
                 x=s.index.values,
                 y=s.values,
                 legend=s.name,
-                color=next(colors),
+                color=_PLOT_COLORS[icol % len(_PLOT_COLORS)],
                 line_width=2,
                 line_join='round')  # color = cls[i]
 
@@ -431,10 +677,7 @@ class PlotResult(BaseResult):
 
     def export_data(self):
         # returns the csv-formatted data, as binary string
-        data = self.data.to_csv(index=False, encoding='utf8')
-        if not isinstance(data, six.binary_type):
-            data = data.encode('utf8')
-        return data
+        return _export_csv(self.data)
 
 
 @tagged
@@ -510,15 +753,26 @@ class Block(Serializable):
         else:
             self.link = dict(zip(['endpoint_id', 'path', 'text'], link))
         if status is None:
-            statorneutral = lambda resu: getattr(resu, 'status', None) or stat.NEUTRAL
-            self.status = max(status_max(statorneutral(res)) for res in self.results)
+            statuses = [getattr(res, 'status', None) for res in self.results]
+            if all(s is None or isinstance(s, (int, np.integer)) for s in statuses):
+                # common case: all result statuses are already scalars, so the
+                # max-reduction is one numpy pass without status_max dispatch
+                arr = np.fromiter((s or stat.NEUTRAL for s in statuses),
+                                  dtype=np.int8, count=len(statuses))
+                self.status = int(arr.max()) if arr.size else stat.NEUTRAL
+            else:
+                # status_max maps None to NEUTRAL and reduces table-valued
+                # statuses to their scalar maximum
+                self.status = max(status_max(s) for s in statuses)
         else:
             self.status = validate_status(status)
 
         if tags:
             if isinstance(tags, compat.string_types):
                 tags = [tags]
-            self.tags = list(set(tags))
+            # dict.fromkeys dedups in one pass and keeps the input order, so
+            # serialized reports don't churn on tag reordering
+            self.tags = list(dict.fromkeys(tags))
         else:
             self.tags = []
 
@@ -558,7 +812,7 @@ class Section(Serializable):
         self.always_expand = always_expand
 
     def fix_dict(self, d):
-        d['blocks'] = [block.to_dict() for block in d['blocks']]
+        d['blocks'] = [block._to_dict_into({}) for block in d['blocks']]
         d.pop('always_expand', None)  # Remove before 1.0.0
         return d
 
@@ -614,24 +868,42 @@ class Report(Serializable):
     @staticmethod
     def from_storage(metafilename, storage):
         log.debug('Loading report object from %s', metafilename)
-        ctx = get_context()
 
         metafile = storage.open(metafilename)
-        parsed = yaml.safe_load(metafile)
+        raw = metafile.read()
         metafile.close()
+        # format >= 1 files are plain JSON, so try the JSON parsers first and
+        # only fall back to YAML for old files
+        parsed = None
+        if orjson is not None:
+            try:
+                parsed = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                pass
+        elif raw.lstrip()[:1] in (b'[', b'{'):
+            try:
+                parsed = json.loads(raw)
+            except ValueError:
+                pass
+        if parsed is None:
+            parsed = yaml.load(raw, Loader=_YamlLoader)
         # if the file contains format version information, write that
         # into the global state
         if isinstance(parsed, collections.Sequence):
             header, reportdata = parsed
-            ctx.current_file_format = header['version']
-            if ctx.current_file_format < 3:
+            version = header['version']
+            if version < 3:
                 dc.deprecate('This file format is no longer supported', removal_version='1.0.0')
         # if not, assume older version
         else:
             dc.deprecate('This file format is no longer supported', removal_version='1.0.0')
             reportdata = parsed
-            ctx.current_file_format = 0
-        report = Report.from_dict(reportdata)
+            version = 0
+        token = _file_format.set(version)
+        try:
+            report = Report.from_dict(reportdata)
+        finally:
+            _file_format.reset(token)
 
         # Let the reportid actually used in the storage overwrite the one derived
         # from the title:
@@ -645,21 +917,23 @@ class Report(Serializable):
         """Assign element IDs that can be used to address individual results, blocks
         and sections"""
         for isec, sec in enumerate(self):
+            sec_id = _int_str(isec)
             sec._secid = isec
-            sec._id = str(isec)
+            sec._id = sec_id
             for iblk, blk in enumerate(sec):
+                blk_id = sec_id + '-' + _int_str(iblk)
                 blk._secid = isec
                 blk._blkid = iblk
-                blk._id = '-'.join(map(str, (isec, iblk)))
+                blk._id = blk_id
                 for ires, res in enumerate(blk):
                     res._secid = isec
                     res._blkid = iblk
                     res._resid = ires
-                    res._id = '-'.join(map(str, (isec, iblk, ires)))
+                    res._id = blk_id + '-' + _int_str(ires)
 
     def fix_dict(self, d):
         DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
-        d['sections'] = [section.to_dict() for section in d['sections']]
+        d['sections'] = [section._to_dict_into({}) for section in d['sections']]
         d['timestamp'] = d['timestamp'].strftime(DATETIME_FORMAT)
         del d['id']
         return d
@@ -696,21 +970,27 @@ class Report(Serializable):
         storage.delete(reskey)
 
         # 2. collect externals
-        resources = [elem._get_externals() for elem in self.iter_children()]
-        resources = dict(e for e in resources if e)
+        children = []
+        self._walk(children)
+        resources = dict(e for e in (elem._get_externals() for elem in children) if e)
 
         try:
             #   3. store externals
-            storage.put(reskey, pickle.dumps(resources, protocol=2))
+            storage.put(reskey, _dumps_resources(resources))
 
             #   4. store report.json
             header = {'version': format_version}  # add format version info
             native = self.to_dict()
-            json_opts = dict(sort_keys=True, indent=4, separators=(',', ': '))
-            json_str = json.dumps([header, native], **json_opts)
-            if not PY2:
-                json_str = json_str.encode('utf-8')
-            storage.put(mainkey, json_str)
+            if hasattr(storage, 'put_file'):
+                # stream section by section instead of building one giant blob
+                with tempfile.SpooledTemporaryFile(max_size=8 << 20) as tmp:
+                    _write_report_json(tmp, header, native)
+                    tmp.seek(0)
+                    storage.put_file(mainkey, tmp)
+            else:
+                buf = BytesIO()
+                _write_report_json(buf, header, native)
+                storage.put(mainkey, buf.getvalue())
 
             #   5. add to index
             _add_to_index(storage, self.id, self.runid, self.runtitle,
@@ -744,7 +1024,7 @@ class Report(Serializable):
         else:
             reskey = newkey
         if reskey in storage:
-            resources = pandas.read_pickle(BytesIO(storage.get(reskey)), compression=None)
+            resources = _loads_resources(storage.get(reskey))
             self._resources = resources
             for child in self.iter_children():
                 child._load_externals(resources)
@@ -761,14 +1041,19 @@ class Report(Serializable):
                     else:
                         yield block
 
+    def _status_array(self):
+        """Collect the block statuses into one small int8 array."""
+        return np.fromiter((blk.status for blk in self.iter_blocks()), dtype=np.int8)
+
     def worst_status(self):
         """Return the worst status value in this report."""
-        return max(blk.status for blk in self.iter_blocks())
+        arr = self._status_array()
+        return int(arr.max()) if arr.size else stat.NEUTRAL
 
     def status_stats(self):
-        count = collections.Counter(blk.status for blk in self.iter_blocks())
-        stats = dict((k, count[k]) for k in stat.status_names.keys())
-        return stats
+        counts = np.bincount(self._status_array(),
+                             minlength=max(stat.status_names) + 1)
+        return {k: int(counts[k]) for k in stat.status_names}
 
     def get_element(self, section, block=None, result=None):
         sec = self.sections[section]
@@ -789,24 +1074,30 @@ class Report(Serializable):
 
 
 def ttlcache(ttl_seconds=30):
-    """Caching decorator that caches function results for a certain time"""
+    """Caching decorator that caches function results for a certain time.
+
+    The previous result is passed back into the function as ``known`` so it
+    can refresh incrementally. Expiry uses the monotonic clock (one C call,
+    no datetime/timedelta allocations per check) and the slot is guarded by
+    a lock so concurrent web workers don't refresh twice."""
 
     def cache_decorator(func):
-        func.max_age = timedelta(seconds=ttl_seconds)
-        func.cache_time = datetime.now() - func.max_age - timedelta(seconds=1)
+        func.max_age = float(ttl_seconds)
+        func.cache_time = None
         func.cache = None
+        func.cache_lock = threading.Lock()
 
         @functools.wraps(func)
         def wrapped(*args, **kwargs):
             ttlcache = kwargs.pop('ttlcache', True)
-            if ttlcache:
-                cache_age = datetime.now() - func.cache_time
-                if cache_age > func.max_age:
+            if not ttlcache:
+                return func(*args, **kwargs)
+            with func.cache_lock:
+                now = time.monotonic()
+                if func.cache_time is None or now - func.cache_time > func.max_age:
                     func.cache = func(*args, known=func.cache, **kwargs)
-                    func.cache_time = datetime.now()
+                    func.cache_time = time.monotonic()
                 return func.cache
-            else:
-                return func(*args, **kwargs)
         return wrapped
     return cache_decorator
 
@@ -814,23 +1105,87 @@ def ttlcache(ttl_seconds=30):
 def read_report(storage, reportid, runid):
     metafilename = os.path.join(reportid, runid, 'report.json')
     if metafilename in storage:
-        tstart = datetime.now()
+        tstart = time.perf_counter()
         try:
             report = Report.from_storage(metafilename, storage)
         except (Exception, YAMLError) as e:
             log.error('Error reading report', exc_info=True)
             exc_str = traceback.format_exception_only(type(e), e)
             raise IOError('Error reading %s / %s: %s' % (reportid, runid, exc_str))
-        duration = (datetime.now() - tstart)
-        log.info(
-            'read_report({0}, {1}) [{2.seconds:d}.{2.microseconds:06d}s]'.format(reportid,
-                                                                                 runid,
-                                                                                 duration))
+        if log.isEnabledFor(logging.INFO):
+            log.info('read_report({0}, {1}) [{2:.6f}s]'.format(
+                reportid, runid, time.perf_counter() - tstart))
         return report
     else:
         raise IOError('report id %s, runid %s not found', reportid, runid)
 
 
+def _walk_metakeys(storage):
+    """Map ``reportid -> {runid: metakeyname}`` from a single key listing.
+
+    One streamed pass over ``storage.iter_keys()`` replaces the per-report
+    and per-run listings (and the membership probes) that a storage walk
+    needed before.
+    """
+    found = {}
+    for key in storage.iter_keys():
+        if not key.endswith('report.json'):
+            continue
+        parts = split_key(key)
+        if len(parts) >= 4:
+            found.setdefault(parts[-4], {})[parts[-3]] = key
+    return found
+
+
+def iter_reports(storage, known=None):
+    """Walk the storage and yield ``(reportid, reportdict)`` pairs, each as
+    soon as the report's runs have been read.
+
+    Consumers can start rendering after the first report instead of waiting
+    for the full walk. Runs already present in `known` are reused without
+    touching the storage again (runs are immutable once written).
+
+    :param storage: Storage instance
+    :param known: (optional) reports found earlier
+    """
+    reports = known if known else {}
+
+    def _read(item):
+        metakeyname = item[2]
+        log.debug('Start reading ' + metakeyname)
+        readstart = time.perf_counter()
+        report = Report.from_storage(metakeyname, storage)
+        if log.isEnabledFor(logging.INFO):
+            log.info(' Done reading {0}, took {1:.6f}s'.format(
+                metakeyname, time.perf_counter() - readstart))
+        return report
+
+    metakeys = _walk_metakeys(storage)
+    work = [(reportid, runid, metakeyname)
+            for reportid in sorted(metakeys)
+            for runid, metakeyname in sorted(metakeys[reportid].items())
+            if runid not in reports.get(reportid, {'runs': {}})['runs']]
+
+    # the reads are independent and I/O-bound, so fan them out to threads and
+    # collect per report, in order, as the futures complete
+    with ThreadPoolExecutor(max_workers=min(32, max(1, len(work)))) as pool:
+        futures = {item: pool.submit(_read, item) for item in work}
+        for reportid in sorted(metakeys):
+            if reportid not in reports:
+                thisreport = {'title': '', 'id': '', 'runs': {}}
+            else:
+                thisreport = reports[reportid]
+
+            for runid, metakeyname in sorted(metakeys[reportid].items()):
+                if runid not in thisreport['runs']:
+                    report = futures[(reportid, runid, metakeyname)].result()
+                    thisreport['runs'][runid] = report
+                    thisreport['title'] = report.title
+                    thisreport['id'] = report.id
+            if len(thisreport['runs']) > 0:
+                yield reportid, thisreport
+
+
 @ttlcache()
 def findreports(storage, known=None):
     """Walk the storage and return a nested data structure with all
@@ -838,6 +1193,8 @@ def findreports(storage, known=None):
     you can provide its last return value in the parameter `known` which avoids
     reading the same data again. Only new reports/runs will be added.
 
+    Thin dict-building wrapper around :func:`iter_reports`.
+
     :param :class:`fs.base.FS` storage: Storage instance
     :param known: (optional) reports found earlier
     """
@@ -847,59 +1204,99 @@ def findreports(storage, known=None):
     else:
         reports = {}
 
-    start = datetime.now()
-    ind = 0
+    start = time.perf_counter()
     log.debug('Starting to read reports')
-    for reportid in list_reports(storage):
-        # Can we find this report in the old dict?
-        if reportid not in reports:
-            thisreport = {'title': '', 'id': '', 'runs': {}}
-        else:
-            thisreport = reports[reportid]
-
-        for runid in list_runs(storage, reportid):
-            metakeyname = join_key(reportid, runid, 'report.json')
-            if runid not in thisreport['runs'] and (metakeyname in storage):
-                log.debug('Start reading ' + metakeyname)
-                ind += 1
-                readstart = datetime.now()
-                report = Report.from_storage(metakeyname, storage)
-                deltat = (datetime.now() - readstart)
-                log.info(' Done reading {0}, took {1.seconds:d}.{1.microseconds:06d}s'.format(metakeyname, deltat))
-                thisreport['runs'][runid] = report
-                thisreport['title'] = report.title
-                thisreport['id'] = report.id
-        if len(thisreport['runs']) > 0:
-            reports[reportid] = thisreport
-    deltat = (datetime.now() - start).seconds
-    log.info('Finished reading reports. Read {} reports in {} seconds'.format(ind, deltat))
+    nknown = sum(len(rep['runs']) for rep in reports.values())
+    for reportid, thisreport in iter_reports(storage, known=reports):
+        reports[reportid] = thisreport
+    ind = sum(len(rep['runs']) for rep in reports.values()) - nknown
+    deltat = time.perf_counter() - start
+    log.info('Finished reading reports. Read {} reports in {:.1f} seconds'.format(ind, deltat))
     return reports
 
 
+def _iter_resulttype_entry_points():
+    """Yield the 'glance.resulttype' entry points via importlib.metadata.
+
+    importlib.metadata reads the dist-info directly instead of importing
+    every distribution the way pkg_resources does; the older APIs are kept
+    as fallbacks for old interpreters."""
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        from pkg_resources import iter_entry_points
+        return iter_entry_points(group='glance.resulttype', name=None)
+    eps = entry_points()
+    if hasattr(eps, 'select'):  # Python >= 3.10
+        return eps.select(group='glance.resulttype')
+    return eps.get('glance.resulttype', ())
+
+
+def _entry_point_module(entry_point):
+    module = getattr(entry_point, 'module', None)
+    if module is None:
+        module = getattr(entry_point, 'module_name', None) or entry_point.value.split(':', 1)[0]
+    return module
+
+
+def _resource_path(module, name):
+    try:
+        from importlib.resources import files
+    except ImportError:  # Python < 3.9
+        from pkg_resources import resource_filename
+        return resource_filename(module, name)
+    try:
+        return str(files(module) / name)
+    except TypeError:
+        # plain-module entry points ('pkg.mod:Class'): files() only accepts
+        # packages, so resolve against the containing package the way
+        # pkg_resources did
+        package = module.rpartition('.')[0]
+        if not package:
+            raise
+        return str(files(package) / name)
+
+
+_plugins_registered = False
+
+
 def register_plugins():
-    from pkg_resources import iter_entry_points, resource_filename
-    for entry_point in iter_entry_points(group='glance.resulttype', name=None):
-        ep_module = entry_point.module_name
-        template_path = resource_filename(ep_module, 'templates')
-        if template_path not in plugin_template_paths:
-            plugin_template_paths.append(template_path)
-            log.debug('Added template path %s from %s', template_path, ep_module)
-
-        static_path = resource_filename(ep_module, 'static')
-        if static_path not in plugin_static_paths:
-            plugin_static_paths[ep_module] = static_path
-
-        cls = entry_point.load()  # nosec
-        if not issubclass(cls, BaseResult):
-            dc.deprecate('Custom result types not subclassing glance.report.BaseResult are unsupported',
-                message=cls.__name__ + ' does not subclass glance.report.BaseResult',
-                removal_version='1.0.0')
-        log.debug('Loaded additional result type %s from %s', cls.__name__, repr(ep_module))
-
-        if hasattr(cls, "static_links"):
-            plugin_static_links.extend([dict(link, module=ep_module) for link in cls.static_links()])
-
-        tagged(cls)
+    """Discover and register result-type plugins from entry points.
+
+    The entry-point scan walks every dist-info on sys.path, so the work is
+    done at most once per process; later calls return immediately."""
+    global _plugins_registered
+    if _plugins_registered:
+        return
+    _plugins_registered = True
+
+    for entry_point in _iter_resulttype_entry_points():
+        # a broken entry point must not abort registration of the rest:
+        # the registered-flag above means there is no second chance
+        try:
+            ep_module = _entry_point_module(entry_point)
+            template_path = _resource_path(ep_module, 'templates')
+            if template_path not in plugin_template_paths:
+                plugin_template_paths.append(template_path)
+                log.debug('Added template path %s from %s', template_path, ep_module)
+
+            static_path = _resource_path(ep_module, 'static')
+            if static_path not in plugin_static_paths:
+                plugin_static_paths[ep_module] = static_path
+
+            cls = entry_point.load()  # nosec
+            if not issubclass(cls, BaseResult):
+                dc.deprecate('Custom result types not subclassing glance.report.BaseResult are unsupported',
+                    message=cls.__name__ + ' does not subclass glance.report.BaseResult',
+                    removal_version='1.0.0')
+            log.debug('Loaded additional result type %s from %s', cls.__name__, repr(ep_module))
+
+            if hasattr(cls, "static_links"):
+                plugin_static_links.extend([dict(link, module=ep_module) for link in cls.static_links()])
+
+            tagged(cls)
+        except Exception:
+            log.exception('Failed to register plugin from entry point %r', entry_point)
 
 
 register_plugins()
@@ -14,12 +14,20 @@ Open questions:
 * Should the list of reports and the list of runs be a dictionary?"""
 from __future__ import absolute_import
 
+from concurrent.futures import ThreadPoolExecutor
 from operator import itemgetter
+import bisect
+import datetime
+import json
 import logging
 import re
 import simplekv
 import yaml
-from simplekv.decorator import PrefixDecorator
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
 from .core.compat import BytesIO
 # noinspection PyUnresolvedReferences
@@ -37,15 +45,65 @@ from . import patch_yaml
 # This is messy and, I guess, not thread safe, but I can't think of a nicer
 # way off of the top of my head.
 
-format_version = 4  # Version of the format when writing
+format_version = 5  # Version of the format when writing
 
 NEW_KEY_SEPARATOR = '.'
 OLD_KEY_SEPARATOR = '/'
 WRITE_KEY_SEPARATOR = OLD_KEY_SEPARATOR
 
+# compiled once: split_key runs per key inside the listing loops, and both
+# separators are single characters, so a character class beats rebuilding
+# an alternation pattern on every call
+_SPLIT_KEY_RE = re.compile('[' + re.escape(OLD_KEY_SEPARATOR + NEW_KEY_SEPARATOR) + ']')
+
 log = logging.getLogger(__name__)
 
 
+def _ts_encoder(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    raise TypeError('cannot serialize {!r} in index'.format(type(obj)))
+
+
+def _parse_index(raw):
+    """Parse an index file into its ``(header, runs)`` pair.
+
+    Format 5 indexes are JSON with ISO-formatted timestamps; anything
+    that is not valid JSON is an older YAML index and goes through the
+    YAML parser instead.
+    """
+    try:
+        header, runs = json.loads(raw)
+    except ValueError:
+        header, runs = yaml.load(raw, Loader=_YamlLoader)
+        return header, runs
+    for run in runs:
+        timestamp = run.get('timestamp')
+        if isinstance(timestamp, str):
+            run['timestamp'] = datetime.datetime.fromisoformat(timestamp)
+        status = run.get('status')
+        if status:
+            # JSON stringifies the status-counter keys; callers look them
+            # up with the int status constants
+            run['status'] = {int(key): value for key, value in status.items()}
+    return header, runs
+
+
+def _first_segment(key):
+    """First component of a key.
+
+    Equivalent to ``split_key(key)[0]`` without the regex split and the
+    list of components it allocates; the listing loops only ever need the
+    leading segment."""
+    i = key.find(OLD_KEY_SEPARATOR)
+    j = key.find(NEW_KEY_SEPARATOR)
+    if i == -1:
+        i = j
+    elif j != -1 and j < i:
+        i = j
+    return key if i == -1 else key[:i]
+
+
 def _ensure_fs(storage):
     if not isinstance(storage, simplekv.KeyValueStore):
         from storefact import get_store
@@ -53,6 +111,50 @@ def _ensure_fs(storage):
     return storage
 
 
+_UNSET = object()
+
+
+class _ReportCtx(object):
+    """Memoized view of one report's keys and index for a single public call.
+
+    The entry points in this module used to re-list the report's keys and
+    re-parse its index in every helper they went through, paying a backend
+    round-trip each time. A context is created once per public call and
+    passed down, so each of those reads happens at most once; index writes
+    go through :meth:`put_index`, which keeps the cached parse current."""
+
+    def __init__(self, storage, reportid):
+        self.storage = storage
+        self.reportid = reportid
+        self.prefix = join_key(reportid, '')
+        self.indexkey = join_key(reportid, 'index')
+        self._keys = None
+        self._index = _UNSET
+
+    def keys(self):
+        """All keys below the report prefix (cached)."""
+        if self._keys is None:
+            self._keys = list(self.storage.iter_keys(self.prefix))
+        return self._keys
+
+    def index(self):
+        """Parsed ``(header, runs)`` of the index, or `None` if there is none (cached)."""
+        if self._index is _UNSET:
+            if self.indexkey in self.storage:
+                self._index = _parse_index(self.storage.get(self.indexkey))
+            else:
+                self._index = None
+        return self._index
+
+    def put_index(self, header, runs):
+        """Write the index back and keep the cached parse in sync."""
+        indexobj = BytesIO()
+        _write_index(indexobj, header, runs)
+        self.storage.put(self.indexkey, indexobj.getvalue())
+        self._index = (header, runs)
+        self._keys = None  # the write may have created the index key
+
+
 def list_runs(storage, reportid):
     """List all runs of a given reportid.
 
@@ -63,8 +165,8 @@ def list_runs(storage, reportid):
         return (OLD_KEY_SEPARATOR in key) or (NEW_KEY_SEPARATOR in key)
 
     prefix = join_key(reportid, '')
-    keys = [k[len(prefix):] for k in storage.keys() if k.startswith(prefix)]  # everything belonging to this report
-    runs = list(set(split_key(key)[0] for key in keys if has_sep(key)))  # keep only 'path'-like key components
+    keys = (k[len(prefix):] for k in storage.iter_keys(prefix))  # everything belonging to this report
+    runs = list(set(_first_segment(key) for key in keys if has_sep(key)))  # keep only 'path'-like key components
     return runs
 
 
@@ -75,20 +177,36 @@ def list_reports(storage):
 
     :return: List of report-ids: ``['report1', 'report2', ... ]``
     """
-    allkeys = list(storage.keys())
-    dirs = list(set([split_key(key)[0] for key in allkeys]))
-
-    def containsrun(prefix):
-        rundirs = [key for key in allkeys
-                   if key.startswith(prefix) and key.endswith('json')]
-        return len(rundirs) > 0
-    reports = sorted(dir for dir in dirs
-                     if join_key(dir, 'index') in allkeys
-                     or containsrun(join_key(dir, '')))
-    return reports
-
-
-def get_report_info(storage, reportid, check_index=False, repair_index=False):
+    # decorated stores (simplekv.decorator.StoreDecorator) delegate via
+    # instance __getattr__, so their class carries no iter_prefixes at all
+    iter_prefixes = getattr(type(storage), 'iter_prefixes', None)
+    if iter_prefixes not in (None, simplekv.KeyValueStore.iter_prefixes):
+        # the backend has a native delimiter listing: use it, and only
+        # probe the handful of report dirs it returns
+        dirs = set(_first_segment(prefix)
+                   for prefix in storage.iter_prefixes(WRITE_KEY_SEPARATOR))
+
+        def containsrun(prefix):
+            return any(key.endswith('json') for key in storage.iter_keys(prefix))
+        return sorted(dir for dir in dirs
+                      if join_key(dir, 'index') in storage
+                      or containsrun(join_key(dir, '')))
+
+    # the default iter_prefixes walks every key anyway, so do that walk
+    # once ourselves and classify each key as we go instead of rescanning
+    # the listing per report dir
+    reports = set()
+    for key in storage.iter_keys():
+        dir = _first_segment(key)
+        if dir in reports:
+            continue
+        if key == join_key(dir, 'index') or (
+                key.endswith('json') and key.startswith(dir + WRITE_KEY_SEPARATOR)):
+            reports.add(dir)
+    return sorted(reports)
+
+
+def get_report_info(storage, reportid, check_index=False, repair_index=False, ctx=None):
     """Get metadata, including list of runs, of one reportdir.
 
     :param storage: Storage handle of reportdir root
@@ -111,18 +229,21 @@ def get_report_info(storage, reportid, check_index=False, repair_index=False):
             ...
         }
     """
+    if ctx is None:
+        ctx = _ReportCtx(storage, reportid)
+
     if check_index or repair_index:
-        extra_dirs, extra_entries = _check_missing(storage, reportid)
+        extra_dirs, extra_entries = _check_missing(storage, reportid, ctx=ctx)
         if extra_dirs or extra_entries:
             log.info('Found %i dirs not in index, %i index entries without data dir', len(extra_dirs), len(extra_entries))
         if repair_index:
-            check_and_repair(storage, reportid)
+            check_and_repair(storage, reportid, ctx=ctx)
 
     reportdata = {}
 
-    indexkey = join_key(reportid, 'index')
-    if indexkey in storage:
-        head, runlist = yaml.safe_load(storage.get(indexkey))
+    parsed = ctx.index()
+    if parsed is not None:
+        head, runlist = parsed
         runs = dict((run['runid'], run) for run in runlist)
 
         reportdata = {
@@ -133,26 +254,36 @@ def get_report_info(storage, reportid, check_index=False, repair_index=False):
     return reportdata
 
 
-def _add_missing(storage, reportid, new_runs):
+def _add_missing(storage, reportid, new_runs, ctx=None):
     """Add index entries for runs that exist but are missing from the index.
 
     :param storage: Base storage
     :param reportid: Report-ID
     :param new_runs: Runs to be added"""
     import glance.report
-    for runid in new_runs:
+
+    def _load(runid):
         try:
             key = join_key(reportid, runid, 'report.json')
             content = glance.report.Report.from_storage(key, storage)
-            info = {'runid': content.runid, 'timestamp': content.timestamp,
+            return {'runid': content.runid, 'timestamp': content.timestamp,
                     'runtitle': content.runtitle, 'status_stats': content.status_stats(),
                     'title': content.title}
-            _add_to_index(storage, reportid, **info)
         except Exception:
             log.exception('Problem reading {}:{}'.format(reportid, runid))
+            return None
 
+    new_runs = list(new_runs)
+    if not new_runs:
+        return
+    # the reads are independent and I/O-bound: fan them out, then merge
+    # all new entries into the index with a single read+write
+    with ThreadPoolExecutor(max_workers=min(16, len(new_runs))) as pool:
+        infos = [info for info in pool.map(_load, new_runs) if info is not None]
+    _add_many_to_index(storage, reportid, infos, ctx=ctx)
 
-def _check_missing(storage, reportid):
+
+def _check_missing(storage, reportid, ctx=None):
     """Check for runs that exist in the storage but are missing from the index.
 
     :param storage: Base storage
@@ -160,25 +291,39 @@ def _check_missing(storage, reportid):
 
     :return: List of existing runs not in index
     """
-    reportdir = PrefixDecorator(join_key(reportid, ''), storage)
+    if ctx is None:
+        ctx = _ReportCtx(storage, reportid)
     indexed_runs = {}
-    if 'index' in reportdir:
-        head, runlist = yaml.safe_load(reportdir.get('index'))
+    parsed = ctx.index()
+    if parsed is not None:
+        head, runlist = parsed
         indexed_runs = dict((run['runid'], run) for run in runlist)
 
     # check if there are dirs that are not in the index file,
-    # or entries in the index without a matching dir:
-    dirs = set(split_key(key)[0] for key in reportdir.keys() if len(split_key(key)) > 1)
+    # or entries in the index without a matching dir; one pass over the
+    # prefix-scoped listing classifies every key, keeping only the
+    # per-run facts we need instead of a set of all keys
+    dirs = set()
+    runs_with_report = set()
+    plen = len(ctx.prefix)
+    for key in ctx.keys():
+        rel = key[plen:]
+        first = _first_segment(rel)
+        if first == rel:  # only keys with at least two components
+            continue
+        dirs.add(first)
+        if rel == join_key(first, 'report.json'):
+            runs_with_report.add(first)
     indexed = set(r['runid'] for r in indexed_runs.values())
     extra_dirs = list(dirs - indexed)
     extra_entries = list(indexed - dirs)
 
-    extraruns = [path for path in extra_dirs if join_key(path, 'report.json') in reportdir]
+    extraruns = [path for path in extra_dirs if path in runs_with_report]
 
     return extraruns, extra_entries
 
 
-def check_and_repair(storage, reportid):
+def check_and_repair(storage, reportid, ctx=None):
     """Compare index file with storage and add runs from storage that are missing in index
     and remove runs from index that are missing in storage.
 
@@ -186,12 +331,37 @@ def check_and_repair(storage, reportid):
 
     :param storage: Storage handle of report root
     :param str reportid: Report-ID"""
-    missing, extra = _check_missing(storage, reportid)
+    if ctx is None:
+        ctx = _ReportCtx(storage, reportid)
+    missing, extra = _check_missing(storage, reportid, ctx=ctx)
     if missing or extra:
         log.info('check_and_repair("%s"): found %i dirs not in index, %i index entries without data dir', reportid, len(missing), len(extra))
-    _add_missing(storage, reportid, missing)
-    for runid in extra:
-        _remove_from_index(storage, reportid, runid)
+    _add_missing(storage, reportid, missing, ctx=ctx)
+    if extra:
+        _remove_many_from_index(storage, reportid, set(extra), ctx=ctx)
+
+
+def _delete_keys(storage, keys):
+    """Delete several keys in one go.
+
+    Uses the store's native bulk delete if it has one; otherwise the
+    single-key deletes are fanned out to threads so the round-trips
+    overlap instead of queueing up.
+
+    :param storage: Storage handle
+    :param keys: List of keys to delete
+    """
+    if not keys:
+        return
+    delete_multi = getattr(storage, 'delete_multi', None)
+    if delete_multi is not None:
+        delete_multi(keys)
+    elif len(keys) == 1:
+        storage.delete(keys[0])
+    else:
+        with ThreadPoolExecutor(max_workers=min(32, len(keys))) as pool:
+            for _ in pool.map(storage.delete, keys):
+                pass
 
 
 def delete_run(storage, reportid, runid):
@@ -207,12 +377,23 @@ def delete_run(storage, reportid, runid):
     # 2 output what will be deleted -> user confirmation
 
     removekey = join_key(reportid, runid)
-    for key in storage.keys():
-        if key.startswith(removekey):
-            storage.delete(key)
+    _delete_keys(storage, list(storage.iter_keys(removekey)))
     _remove_from_index(storage, reportid, runid)
 
 
+def _delete_runs(storage, reportid, runids, ctx=None):
+    """Delete several runs of one report with a single batched key delete.
+
+    :param storage: Storage handle of report root
+    :param str reportid: Report-ID
+    :param runids: Run-IDs to delete
+    """
+    keys = [key for runid in runids
+            for key in storage.iter_keys(join_key(reportid, runid))]
+    _delete_keys(storage, keys)
+    _remove_many_from_index(storage, reportid, set(runids), ctx=ctx)
+
+
 def delete_older(storage, reportid, cutoff, dryrun=False):
     """Delete report runs older than the cutoff timestamp.
 
@@ -230,18 +411,26 @@ def delete_older(storage, reportid, cutoff, dryrun=False):
     """
 
     storage = _ensure_fs(storage)
+    ctx = _ReportCtx(storage, reportid)
+
+    # the index is kept sorted by timestamp: if even the oldest entry is
+    # newer than the cutoff there is nothing to do, and the repair scan
+    # can be skipped
+    parsed = ctx.index()
+    if parsed is not None:
+        runs = parsed[1]
+        if runs and runs[0]['timestamp'] >= cutoff:
+            return []
 
     if not dryrun:
-        check_and_repair(storage=storage, reportid=reportid)
+        check_and_repair(storage=storage, reportid=reportid, ctx=ctx)
 
-    info = get_report_info(storage, reportid)
+    info = get_report_info(storage, reportid, ctx=ctx)
 
-    deletelist = []
-    for reportrun in info['runs'].values():
-        if reportrun['timestamp'] < cutoff:
-            if not dryrun:
-                delete_run(storage, reportid, reportrun['runid'])
-            deletelist.append(reportrun['runid'])
+    deletelist = [reportrun['runid'] for reportrun in info['runs'].values()
+                  if reportrun['timestamp'] < cutoff]
+    if not dryrun:
+        _delete_runs(storage, reportid, deletelist, ctx=ctx)
     return deletelist
 
 
@@ -257,73 +446,110 @@ def delete_keeping_n(storage, reportid, n, dryrun=False):
     """
 
     storage = _ensure_fs(storage)
+    ctx = _ReportCtx(storage, reportid)
+
+    # count the run dirs from the key listing first: with n or fewer runs
+    # in storage there is nothing to delete, indexed or not, and the
+    # repair scan can be skipped (the listing stays cached in ctx)
+    plen = len(ctx.prefix)
+    rundirs = set()
+    for key in ctx.keys():
+        rel = key[plen:]
+        first = _first_segment(rel)
+        if first != rel:
+            rundirs.add(first)
+    if len(rundirs) <= n:
+        return []
 
     if not dryrun:
-        check_and_repair(storage=storage, reportid=reportid)
+        check_and_repair(storage=storage, reportid=reportid, ctx=ctx)
 
-    info = get_report_info(storage, reportid)
+    info = get_report_info(storage, reportid, ctx=ctx)
     timesorted = sorted(list(info['runs'].values()), key=itemgetter('timestamp'), reverse=True)
 
-    deletelist = []
-    for reportrun in timesorted[n:]:
-        if not dryrun:
-            delete_run(storage, reportid, reportrun['runid'])
-        deletelist.append(reportrun['runid'])
+    deletelist = [reportrun['runid'] for reportrun in timesorted[n:]]
+    if not dryrun:
+        _delete_runs(storage, reportid, deletelist, ctx=ctx)
     return deletelist
 
 
-def _add_to_index(storage, reportid, runid, runtitle, timestamp, title, status_stats):
-    indexkey = join_key(reportid, 'index')
-    index_header = {'version': format_version, 'title': title}
-    if indexkey in storage:
-        try:
-            parsed = yaml.safe_load(storage.get(indexkey))
-            old_header, index_content = tuple(parsed)
-        except (IOError, TypeError):
-            index_content = []
-    else:
-        index_content = []
-    selfindex = {
+def _add_many_to_index(storage, reportid, infos, ctx=None):
+    """Add several runs to the index with one read and one write.
+
+    :param storage: Base storage
+    :param reportid: Report-ID
+    :param infos: List of dicts with runid, runtitle, timestamp, title
+        and status_stats, as collected from the run's Report
+    """
+    if not infos:
+        return
+    if ctx is None:
+        ctx = _ReportCtx(storage, reportid)
+    index_header = {'version': format_version, 'title': infos[-1]['title']}
+    try:
+        parsed = ctx.index()
+    except (IOError, TypeError, ValueError):
+        parsed = None
+    # if any of the runids are already there, remove those first
+    newids = set(info['runid'] for info in infos)
+    index_content = [d for d in (parsed[1] if parsed is not None else [])
+                     if d['runid'] not in newids]
+    # the index is kept sorted by timestamp, so a bisect insert replaces
+    # the full re-sort that every add used to pay
+    timestamps = [d['timestamp'] for d in index_content]
+    for info in sorted(infos, key=itemgetter('timestamp')):
+        pos = bisect.bisect_right(timestamps, info['timestamp'])
+        index_content.insert(pos, {
+            'runid': info['runid'],
+            'runtitle': info['runtitle'],
+            'timestamp': info['timestamp'],
+            'status': info['status_stats'],
+        })
+        timestamps.insert(pos, info['timestamp'])
+    ctx.put_index(index_header, index_content)
+
+
+def _add_to_index(storage, reportid, runid, runtitle, timestamp, title, status_stats, ctx=None):
+    _add_many_to_index(storage, reportid, [{
         'runid': runid,
         'runtitle': runtitle,
         'timestamp': timestamp,
-        'status': status_stats,
-    }
-    # if same runid is already there, remove that first
-    index_content = list(filter(lambda d: d['runid'] != runid, index_content))
-    index_content.append(selfindex)
-    timesorted = sorted(index_content, key=itemgetter('timestamp'))
-    indexfile = BytesIO()
-    _write_index(indexfile, index_header, timesorted)
-    storage.put(indexkey, indexfile.getvalue())
+        'title': title,
+        'status_stats': status_stats,
+    }], ctx=ctx)
 
 
 def _write_index(stream, header, runs):
-    class MyDumper(yaml.SafeDumper):
-        def represent_sequence(self, tag, sequence, flow_style=None):
-            return yaml.SafeDumper.represent_sequence(self, tag, sequence, flow_style=False)
-    yaml.dump([header, runs], stream, width=500, Dumper=MyDumper, default_flow_style=True, encoding='utf-8')
+    stream.write(json.dumps([header, runs], default=_ts_encoder,
+                            separators=(',', ':')).encode('utf-8'))
 
 
-def _remove_from_index(storage, reportid, runid):
-    """Remove a run from the index.
+def _remove_many_from_index(storage, reportid, runids, ctx=None):
+    """Remove several runs from the index with one read and one write.
 
     :param storage: Base storage
     :param reportid: Report-ID
-    :param runid: ID of the run that should be deleted
+    :param runids: Set of run-IDs that should be deleted
     """
-    indexkey = join_key(reportid, 'index')
-    if indexkey in storage:
-        indexfile = storage.open(indexkey)
-        parsed = yaml.safe_load(indexfile)
-        indexfile.close()
-        index_header, index_content = tuple(parsed)
+    if ctx is None:
+        ctx = _ReportCtx(storage, reportid)
+    parsed = ctx.index()
+    if parsed is not None:
+        index_header, index_content = parsed
         index_header['version'] = format_version
 
-        keeplist = [run for run in index_content if run['runid'] != runid]
-        indexobj = BytesIO()
-        _write_index(indexobj, index_header, keeplist)
-        storage.put(indexkey, indexobj.getvalue())
+        keeplist = [run for run in index_content if run['runid'] not in runids]
+        ctx.put_index(index_header, keeplist)
+
+
+def _remove_from_index(storage, reportid, runid, ctx=None):
+    """Remove a run from the index.
+
+    :param storage: Base storage
+    :param reportid: Report-ID
+    :param runid: ID of the run that should be deleted
+    """
+    _remove_many_from_index(storage, reportid, {runid}, ctx=ctx)
 
 
 def join_key(*args):
@@ -332,6 +558,4 @@ def join_key(*args):
 
 
 def split_key(key):
-    separators = [OLD_KEY_SEPARATOR, NEW_KEY_SEPARATOR]
-    pat = '|'.join(re.escape(ch) for ch in separators)
-    return re.split(pat, key)
+    return _SPLIT_KEY_RE.split(key)
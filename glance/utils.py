@@ -2,6 +2,7 @@
 
 from __future__ import absolute_import
 import re
+from functools import lru_cache
 from unicodedata import normalize
 import collections
 import logging
@@ -18,9 +19,14 @@ from .core.compat import text_type, binary_type
 
 log = logging.getLogger(__name__)
 
+# memoized once: validate_status runs per overlay in combine_status, and
+# membership tests against a list were O(k) per element
+_VALID_STATUS = frozenset(status_names)
+_VALID_STATUS_LIST = list(_VALID_STATUS)
 
-_punct_re = re.compile(br'\W+')
-_spaces_re = re.compile(br'\s+')
+
+# re.ASCII keeps \W meaning non-[a-zA-Z0-9_], as the old bytes pattern did
+_punct_re = re.compile(r'\W+', re.ASCII)
 
 german_chars = {u'Ä': 'Ae', u'Ö': 'Oe', u'Ü': 'Ue', u'ä': 'ae', u'ö': 'oe',
                     u'ü': 'ue', u'ß': 'ss'}
@@ -36,29 +42,69 @@ def slugify(text, delim='-', default_char='_'):
 
     :returns: A string of only lowercase ascii letters and digits, `delim` and `default_char`
     """
-    result = []
     sanitized = normalize('NFKD', text_type(text).translate(umap))
-    sanitized_ascii = sanitized.encode('ascii', 'ignore')
-    for word in _punct_re.split(sanitized_ascii):
-        word = word.lower()
-        # handle characters lost in the ascii encoding (end up as space characters):
-        word = _spaces_re.sub(default_char, word)
-        result.append(word.decode('ascii'))
-    return delim.join(result)
+    # characters that can't be normalized to ascii are simply dropped here
+    sanitized_ascii = sanitized.encode('ascii', 'ignore').decode('ascii').lower()
+    return delim.join(_punct_re.split(sanitized_ascii))
 
 
-def _df_locations(df):
-    """Return a sequence of (irow, icol) for each True value in df"""
-    irow = pandas.DataFrame(list(df.columns) * len(df.index))  # sequence of col-indices
-    icol = pandas.DataFrame(df.index.repeat(len(df.columns)))  # sequence of row-indices
-    coltrue = irow[df.values.flatten()]  # col-indices where df is true
-    rowtrue = icol[df.values.flatten()]  # row-indices where df is true
-    return _array2tuple(np.hstack((rowtrue, coltrue)))   # numpy-equivalent of zip() -> [[r0,c0], [r1,c1], ...]
+# slugify is pure, and hot callers (the template filter, metric labels, tag
+# IDs) pass the same strings over and over — memoize the answers
+cached_slugify = lru_cache(maxsize=4096)(slugify)
+
+
+class StatusArray(object):
+    """Lightweight container for per-element status values.
+
+    Holds a contiguous int8 ndarray together with the index and columns needed
+    to rebuild the equivalent :class:`pandas.DataFrame`, which is only
+    constructed (once) when somebody asks for it via :meth:`to_frame`.
+    Comparisons delegate to the ndarray, so ``status == BAD`` keeps working
+    without materializing the frame.
+    """
+
+    def __init__(self, values, index, columns):
+        self.values = values
+        self.index = index
+        self.columns = columns
+        self._frame = None
+
+    @classmethod
+    def from_frame(cls, frame):
+        status = cls(frame.values, frame.index, frame.columns)
+        status._frame = frame
+        return status
+
+    def to_frame(self):
+        if self._frame is None:
+            self._frame = pandas.DataFrame(
+                self.values, index=self.index, columns=self.columns, copy=False)
+        return self._frame
+
+    @property
+    def size(self):
+        return self.values.size
 
+    def __len__(self):
+        return len(self.values)
 
-def _array2tuple(a):
-    """Turn a two-dimensional numpy array into a tuple of tuples ((), (), ...)"""
-    return tuple(tuple(elem for elem in row) for row in a)
+    def __eq__(self, other):
+        return self.values == other
+
+    def __ne__(self, other):
+        return self.values != other
+
+    def max(self):
+        return self.values.max()
+
+    def __repr__(self):
+        return 'StatusArray({!r})'.format(self.values)
+
+
+def _df_locations(df):
+    """Return a sequence of (irow, icol) for each True value in df"""
+    rows, cols = np.nonzero(df.values)
+    return list(zip(rows.tolist(), cols.tolist()))
 
 
 def status_max(data):
@@ -67,6 +113,11 @@ def status_max(data):
     data = validate_status(data)
     if data is None:
         return None
+    if isinstance(data, StatusArray):
+        if data.size > 0:
+            return int(data.values.max())
+        else:
+            return None
     if isinstance(data, pandas.DataFrame):
         flat = data.values.flatten()
         if len(flat) > 0:
@@ -115,23 +166,35 @@ def validate_status(stat, replace_invalid=None):
         msg += colmsg
         return msg
 
-    valid_values = list(status_names.keys())
+    if isinstance(stat, StatusArray):
+        # int8 statuses can't be NaN; only fall back to the DataFrame path
+        # (and its verbose error message) if something is actually invalid
+        if np.isin(stat.values, _VALID_STATUS_LIST).all():
+            return stat
+        stat = stat.to_frame()
     if isinstance(stat, pandas.DataFrame):
-        stat = stat.where(~stat.isnull(), other=NEUTRAL)  # NaNs are acceptable ⇨ set to NEUTRAL
-        invalid = ~stat.isin(valid_values)   # Find invalid status values
-        ninvalid = invalid.values.sum()
-        if ninvalid > 0:
+        # work on the ndarray: each DataFrame.where in the old chain
+        # allocated a full-size copy
+        arr = stat.to_numpy()
+        mask_nan = pandas.isnull(arr)
+        if mask_nan.any():
+            arr = np.where(mask_nan, NEUTRAL, arr)  # NaNs are acceptable ⇨ set to NEUTRAL
+        invalid_mask = ~np.isin(arr, _VALID_STATUS_LIST)   # Find invalid status values
+        if invalid_mask.any():
+            invalid = pandas.DataFrame(
+                invalid_mask, index=stat.index, columns=stat.columns, copy=False)
             msg = format_message(invalid)
             log.warning(msg)
             if replace_invalid is None:
                 raise ValueError(msg)
-            stat = stat.where(~invalid, other=replace_invalid)
+            arr = np.where(invalid_mask, replace_invalid, arr)
+        stat = pandas.DataFrame(arr, index=stat.index, columns=stat.columns, copy=False)
     else:
         if stat is None:
             stat = NEUTRAL
         if isinstance(stat, np.integer):
             stat = int(stat)
-        good = stat in valid_values
+        good = stat in _VALID_STATUS
         if not good:
             msg = 'Invalid status: {} {}'.format(stat, type(stat))
             log.warning(msg)
@@ -142,10 +205,10 @@ def validate_status(stat, replace_invalid=None):
 
 
 def ensure_dataframe(data):
-    """Accept number (int, float), Series, or DataFrame and always return a DataFrame"""
+    """Accept number (int, float), Series, StatusArray, or DataFrame and always return a DataFrame"""
     if isinstance(data, pandas.DataFrame):
         return data
-    if isinstance(data, pandas.Series):
+    if isinstance(data, (pandas.Series, StatusArray)):
         return data.to_frame()
     if isinstance(data, (int, float)) or data is None:
         return pandas.DataFrame([data])
@@ -167,7 +230,10 @@ def combine_status(ref, statuslist):
         statuslist = [statuslist]
     statuslist = [validate_status(ensure_dataframe(d)) for d in statuslist]
 
-    status = pandas.DataFrame(index=ref.index, columns=ref.columns, dtype=int).fillna(NEUTRAL)
+    # every overlay is a subset of ref's index/columns (possibly transposed),
+    # so aligning it onto ref and taking the elementwise maximum replaces the
+    # concat+groupby round-trip the loop used to pay per overlay
+    status_arr = np.full((len(ref.index), len(ref.columns)), NEUTRAL, dtype=np.int64)
 
     refcols = set(ref.columns)
     refind = set(ref.index)
@@ -185,6 +251,8 @@ def combine_status(ref, statuslist):
             overlay = overlay.T
 
         if rot_match or direct_match:
-            combined = pandas.concat([status, overlay], sort=True)
-            status = combined.groupby(combined.index).max().astype(int)
-    return status
+            aligned = overlay.reindex(index=ref.index, columns=ref.columns,
+                                      fill_value=NEUTRAL)
+            np.maximum(status_arr, aligned.to_numpy().astype(np.int64, copy=False),
+                       out=status_arr)
+    return pandas.DataFrame(status_arr, index=ref.index, columns=ref.columns)
@@ -47,11 +47,19 @@ class PlotWithXResult(PlotResult):
                                             'lightseagreen',
                                             'lightslategray'])
         self.vbars = kwargs.pop('vbars', [])
+        # computed once here; fix_dict and render_html reuse it instead of
+        # rescanning all columns per call
+        self._dt_columns = get_datetime_columns(self.data)
 
     def fix_dict(self, d):
-        d['datetime_columns'] = get_datetime_columns(d['data'])
+        d.pop('_dt_columns', None)
+        d['datetime_columns'] = list(self._dt_columns)
         for col in d['datetime_columns']:
-            d['data'][col] = d['data'][col].apply(lambda x: x.strftime('%Y-%m-%d-%H-%M-%S'))
+            series = d['data'][col]
+            if not pd.api.types.is_datetime64_any_dtype(series):
+                # object columns holding date/datetime instances
+                series = pd.to_datetime(series)
+            d['data'][col] = series.dt.strftime('%Y-%m-%d-%H-%M-%S')
         d['data'] = d['data'].to_dict(orient='split')
         return d
 
@@ -73,7 +81,7 @@ class PlotWithXResult(PlotResult):
                 'x_axis_label': self.x_column,
                 'y_axis_label': self.y_axis_label,
                 }
-        if self.x_column in get_datetime_columns(self.data):
+        if self.x_column in self._dt_columns:
             args['x_axis_type'] = 'datetime'
         fig = bk.figure(**args)
         if self.build_legend:
@@ -81,10 +89,9 @@ class PlotWithXResult(PlotResult):
         else:
             colors = self.colors[:1]
         source = bk.ColumnDataSource(self.data)
-        for i, col in enumerate(self.data):
+        plot_cols = [c for c in self.data.columns if c != self.x_column]
+        for i, col in enumerate(plot_cols):
             legend = col if self.build_legend else None
-            if col == self.x_column:
-                continue
             fig.line(x=self.x_column,
                      y=col,
                      source=source,
@@ -99,10 +106,16 @@ class PlotWithXResult(PlotResult):
                            color=colors[i % len(colors)],
                            size=9)
 
+        if self.vbars:
+            # the y-range doesn't change between bars: compute it once with a
+            # single numpy reduction over the non-x columns; nan-aware like
+            # the pandas reductions, so gaps in the data don't break the range
+            non_x = self.data[plot_cols].to_numpy()
+            y_lo = np.nanmin(non_x) * 1.1
+            y_hi = np.nanmax(non_x) * 1.1
         for i, col in enumerate(self.vbars):
             fig.line([self.vbars[col], self.vbars[col]],
-                     [self.data.drop([self.x_column], axis=1).min().min() * 1.1,
-                     self.data.drop([self.x_column], axis=1).max().max() * 1.1],
+                     [y_lo, y_hi],
                      legend=col,
                      color=colors[i % len(colors)],
                      alpha=0.8,
@@ -113,13 +126,12 @@ class PlotWithXResult(PlotResult):
 
 
 def get_datetime_columns(df):
-    dt_columns = list()
-    for col in df.columns:
-        if df[col].dtype.type == np.datetime64:
-            dt_columns.append(col)
-            continue
-        if len(df[col]) == 0:
-            continue
-        if hasattr(df[col].iloc[0], 'strftime'):
-            dt_columns.append(col)
+    # vectorized dtype dispatch: datetime64 columns come from a single
+    # select_dtypes call, and only object columns of a non-empty frame
+    # still need the duck-typed probe of their first element
+    dt_columns = list(df.select_dtypes(include=['datetime', 'datetimetz']).columns)
+    if len(df) > 0:
+        for col in df.select_dtypes(include=['object']).columns:
+            if hasattr(df[col].iloc[0], 'strftime'):
+                dt_columns.append(col)
     return dt_columns
@@ -9,7 +9,6 @@ from __future__ import division, print_function, absolute_import
 from glance.report import tagged, BaseResult
 
 import os
-import codecs
 
 
 @tagged
@@ -40,11 +39,11 @@ class TextDownloadResult(BaseResult):
         if use_key is not None:
             self._external = use_key
         else:
-            self._external = codecs.encode(os.urandom(4), 'hex').decode('utf8')
+            self._external = os.urandom(4).hex()
 
     def _get_externals(self, storage=None):
         if self.data is not None:
-            data = dict([(attr, getattr(self, attr)) for attr in self.externals])
+            data = {attr: getattr(self, attr) for attr in self.externals}
             return self._external, data
         else:
             return 'dummy', 0
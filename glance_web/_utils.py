@@ -7,7 +7,7 @@ import os
 import socket
 import logging
 import warnings
-from functools import wraps
+from functools import lru_cache, wraps
 
 import flask
 
@@ -15,6 +15,7 @@ log = logging.getLogger(__name__)
 warnings.filterwarnings('module', module='glance.web')
 
 
+@lru_cache(maxsize=None)
 def find_external_address():
     try:
         import netifaces
@@ -30,6 +31,7 @@ def find_external_address():
     return ext_ifaddress
 
 
+@lru_cache(maxsize=None)
 def find_hostname(bind_addr=None):
     ext_ifaddress = bind_addr
     if not bind_addr or bind_addr == '0.0.0.0':
@@ -88,18 +90,23 @@ class ReverseProxied(object):
 
     :param app: the WSGI application
     '''
+    __slots__ = ('app',)
+
     def __init__(self, app):
         self.app = app
 
     def __call__(self, environ, start_response):
-        script_name = environ.get('HTTP_X_SCRIPT_NAME', '')
+        # runs on every request; keep the common no-proxy-headers case cheap
+        get = environ.get
+        script_name = get('HTTP_X_SCRIPT_NAME')
+        scheme = get('HTTP_X_SCHEME')
+        if not script_name and not scheme:
+            return self.app(environ, start_response)
         if script_name:
             environ['SCRIPT_NAME'] = script_name
             path_info = environ['PATH_INFO']
             if path_info.startswith(script_name):
                 environ['PATH_INFO'] = path_info[len(script_name):]
-
-        scheme = environ.get('HTTP_X_SCHEME', '')
         if scheme:
             environ['wsgi.url_scheme'] = scheme
         return self.app(environ, start_response)
@@ -133,7 +140,19 @@ def compose(*funcs):
     """Compose functions.
 
     ``c = compose(f, g, h)`` returns a new function `c`, so that ``c(x)`` is equivalent to ``f(g(h(x)))``."""
-    first, tail = funcs[-1], reversed(funcs[:-1])
+    # specialize the common short chains: no loop, no iterator, only local
+    # name lookups per call
+    if len(funcs) == 1:
+        return funcs[0]
+    if len(funcs) == 2:
+        f, g = funcs
+        return lambda *args, **kwargs: f(g(*args, **kwargs))
+    if len(funcs) == 3:
+        f, g, h = funcs
+        return lambda *args, **kwargs: f(g(h(*args, **kwargs)))
+    first = funcs[-1]
+    tail = tuple(reversed(funcs[:-1]))
+
     def composed(*args, **kwargs):
         ret = first(*args, **kwargs)
         for f in tail:
@@ -5,6 +5,7 @@ from __future__ import (absolute_import, division, print_function)
 
 import sys
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 import cachetools
@@ -78,22 +79,57 @@ class _ReportInfoCache(cachetools.TTLCache):
         """
         try:
             info = self._update_reportinfo(reportid)
-            group, shorttitle = _groupsplit(info['title'])
-            info['group'] = group
-            info['shorttitle'] = shorttitle
-
-            runlist = info['runs']
-            timesorted = sorted(runlist.values(), key=lambda v: v['timestamp'], reverse=True)
-            if runlist:
-                info['latest'] = timesorted[0]['runid']
-            else:
-                info['latest'] = None
-            self[reportid] = info
-            return info
+            self[reportid] = self._decorate(info)
+            return self[reportid]
         except IOError:
             self[reportid] = None
             return None
 
+    @staticmethod
+    def _decorate(info):
+        """Add the derived fields (group, shorttitle, latest) to a raw info dict."""
+        group, shorttitle = _groupsplit(info['title'])
+        info['group'] = group
+        info['shorttitle'] = shorttitle
+
+        runlist = info['runs']
+        timesorted = sorted(runlist.values(), key=lambda v: v['timestamp'], reverse=True)
+        if runlist:
+            info['latest'] = timesorted[0]['runid']
+        else:
+            info['latest'] = None
+        return info
+
+    def warm(self, reportids):
+        """Read the report infos for all uncached IDs as one parallel batch.
+
+        A cold cache otherwise pays one sequential storage round-trip per
+        report when the web index is built. simplekv has no multi-get, so
+        the batch is expressed as concurrent single gets; cache bookkeeping
+        stays in the calling thread.
+        """
+        missing = [rid for rid in reportids if rid not in self]
+        if len(missing) < 2:
+            return
+
+        def _read(reportid):
+            try:
+                return reportid, glance.storage.get_report_info(
+                    self.storage, reportid, check_index=False)
+            except IOError:
+                log.exception('Error reading report info for "{}"'.format(reportid))
+                return reportid, None
+
+        with ThreadPoolExecutor(max_workers=min(16, len(missing))) as pool:
+            results = list(pool.map(_read, missing))
+        for reportid, info in results:
+            if info is None:
+                if reportid in self.reportlist:
+                    self.reportlist.remove(reportid)
+                self[reportid] = None
+            else:
+                self[reportid] = self._decorate(info)
+
     def _update_reportinfo(self, reportid):
         log.info('API root {}: reportinfo cache miss for "{}". Read and store.'.format(id(self), reportid))
         try:
@@ -109,13 +145,13 @@ class _ReportInfoCache(cachetools.TTLCache):
     def list_reports(self):
         """Return a list of all report IDs."""
         reportlist = glance.storage.list_reports(self.storage)
-        # invalidate caches for reports that have gone away:
-        for reportid in self.keys():
-            if reportid not in reportlist:
-                self.reportinfo.pop(reportid)
-        for reportid in self.reports.keys():
-            if reportid not in reportlist:
-                self.reports.pop(reportid)
+        current = set(reportlist)
+        # invalidate caches for reports that have gone away; collect first so
+        # we don't mutate the dicts while iterating them
+        for reportid in [rid for rid in self.keys() if rid not in current]:
+            self.pop(reportid)
+        for reportid in [rid for rid in self.reports if rid not in current]:
+            self.reports.pop(reportid)
         # make sure there's a cache for each reportid in the reports cache:
         for reportid in reportlist:
             if reportid not in self.reports:
@@ -156,9 +192,12 @@ class API(object):
         ==========  =========================================================
         """
         reports = {}
-        for rid in self.list_reports():
+        reportids = self.list_reports()
+        self.reportinfo.warm(reportids)
+        for rid in reportids:
             info = self.reportinfo[rid]
-            group, shorttitle = _groupsplit(info['title'])
+            if info is None:
+                continue
             latest_id = info['latest']
 
             if latest_id is None:
@@ -167,8 +206,10 @@ class API(object):
             latest_run = info['runs'][latest_id]
             reports[rid] = {
                 'title': info['title'],
-                'group': group,
-                'shorttitle': shorttitle,
+                # group/shorttitle were split once when the cache entry was
+                # built; reuse them instead of re-splitting per request
+                'group': info['group'],
+                'shorttitle': info['shorttitle'],
                 'latest': latest_id,
                 'timestamp': latest_run['timestamp'],
                 'updated': latest_run['timestamp'].isoformat(),
@@ -181,28 +222,22 @@ class API(object):
         """Returns an `OrderedDict` with all report groups and the reports belonging to each group."""
         groups = OrderedDict()
 
-        def _groupkey(reportid):
-            group = _groupsplit(self.reportinfo[reportid]['title'])[0]
-            if self.groupkey is None:
-                return group
-            else:
-                return self.groupkey(group)
-
-        def _titlekey(reportid):
-            title = _groupsplit(self.reportinfo[reportid]['title'])[1]
-            if self.titlekey is None:
-                return title
-            else:
-                return self.titlekey(title)
-
-        for reportid in sorted(sorted(self.list_reports(), key=_titlekey), key=_groupkey):
+        # split each title exactly once, then sort the decorated list in a
+        # single pass on the (group, title) pair
+        decorated = []
+        reportids = self.list_reports()
+        self.reportinfo.warm(reportids)
+        for reportid in reportids:
             info = self.reportinfo[reportid]
-            latest_id = info['latest']
-
-            if latest_id is None:
+            if info is None or info['latest'] is None:
                 continue
+            decorated.append((reportid, info['group'], info['shorttitle']))
+
+        groupkey = self.groupkey if self.groupkey is not None else lambda group: group
+        titlekey = self.titlekey if self.titlekey is not None else lambda title: title
+        decorated.sort(key=lambda item: (groupkey(item[1]), titlekey(item[2])))
 
-            group = self.reportinfo[reportid]['group']
+        for reportid, group, _ in decorated:
             groups.setdefault(group, []).append(reportid)
 
         return groups
@@ -5,22 +5,28 @@ from __future__ import (absolute_import, division, print_function)
 
 import logging
 import os
+import tempfile
 
 import sys
 
 import click
 import flask
+import jinja2
 import yaml
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # libyaml not available
+    from yaml import SafeLoader as _YamlLoader
 from debtcollector import deprecate
 
 from flask import Flask
 from flask_caching import Cache
-from flaskext.markdown import Markdown
+import markdown
 
 import simplekv, simplekv.decorator
 from storefact._hstores import HFilesystemStore
 
-from glance.web._utils import ReverseProxied, compose
+from glance.web._utils import ReverseProxied
 from glance.web.api import API
 from glance.web.bpui import make_ui_blueprint
 from glance.web.bpapi import make_api_blueprint
@@ -30,6 +36,15 @@ from glance.web.bpprometheus import make_prometheus_blueprint
 logging.basicConfig(level=logging.DEBUG)
 log = logging.getLogger('glance.web.newapp')
 
+# one parser per process; building a Markdown instance per render (as
+# Flask-Markdown did) re-registers all extensions each time
+_MD = markdown.Markdown(output_format='html5')
+
+
+def _render_markdown(text):
+    _MD.reset()
+    return flask.Markup(_MD.convert(text))
+
 
 def _require_login():
     if 'cas' not in flask.current_app.blueprints:
@@ -67,19 +82,29 @@ def _configure_app(app, config):
 
 
     # Flask extensions
-    Markdown(app)
-    Cache(app, config={'CACHE_TYPE': 'simple'})
+    app.jinja_env.filters['markdown'] = _render_markdown
+    # 'simple' is per-process, so under a multi-worker server every worker
+    # misses on its own — but it is also isolated. A shared backend (redis,
+    # or a filesystem cache in a private directory) is opt-in via the
+    # 'cache' option: a default under shared /tmp would collide between
+    # instances and let other local users plant pickled cache entries.
+    cache_config = config.get('cache') or {'CACHE_TYPE': 'simple'}
+    Cache(app, config=cache_config)
 
     # Require logged-in user if CAS options are set:
     if config.get('auth', False):
         from flask_cas import CAS
         authconf = config['auth']
 
-        if sys.version_info >= (2, 7, 9):
-            # monkeypatch ssl to avoid
-            # http://stackoverflow.com/questions/27835619/ssl-certificate-verify-failed-error
+        # CAS servers often sit behind an internal CA. Verify against the
+        # configured bundle instead of installing the unverified context
+        # globally — besides the security hole, that also defeated TLS
+        # session reuse, so every CAS validation redid the full handshake.
+        ca_bundle = authconf.get('ca_bundle')
+        if ca_bundle:
             import ssl
-            ssl._create_default_https_context = ssl._create_unverified_context
+            ctx = ssl.create_default_context(cafile=ca_bundle)
+            ssl._create_default_https_context = lambda: ctx
 
         CAS(app)
         app.config['CAS_SERVER'] = authconf['cas_server']
@@ -106,6 +131,25 @@ def _register_auth_check(blueprint):
     blueprint.before_request(_authcheck)
 
 
+def _precompile_templates(app):
+    """Compile all templates at startup so the first request doesn't pay for it.
+
+    Compiled bytecode is additionally cached on disk, which also lets the
+    workers of a multi-process server share one compilation.
+    """
+    app.jinja_env.auto_reload = False
+    # a fresh private directory (0700): a predictable path under shared /tmp
+    # would let another local user plant bytecode for the app to execute.
+    # Workers forked after create_app still share it.
+    cache_dir = tempfile.mkdtemp(prefix='glance-jinja-cache-')
+    app.jinja_env.bytecode_cache = jinja2.FileSystemBytecodeCache(cache_dir)
+    for name in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(name)
+        except jinja2.TemplateError:
+            log.warning('failed to precompile template "%s"', name)
+
+
 def create_app(reports_path, title, debug=None, config=()):
     """Create the monitoring flask app
 
@@ -130,12 +174,21 @@ def create_app(reports_path, title, debug=None, config=()):
     |                     |                |                                                       |
     |                     |                |     {'cas_server': 'https://sso.blue-yonder.org',     |
     |                     |                |      'cas_login_route': '/cas/login',                 |
+    |                     |                |      'ca_bundle': '/path/to/internal-ca.pem',         |
     |                     |                |      'allowed_users': [...]},                         |
     |                     |                |      'server_name': 'some.machine.rack.zone:5000',    |
     |                     |                |     }                                                 |
     +---------------------+----------------+-------------------------------------------------------+
     | group_sort_key      | None           | Sort key for groups. See :py:func:`sorted`            |
     +---------------------+----------------+-------------------------------------------------------+
+    | cache               | None           | Flask-Caching configuration dictionary. Defaults to   |
+    |                     |                | the per-process 'simple' backend; pass e.g.::         |
+    |                     |                |                                                       |
+    |                     |                |     {'CACHE_TYPE': 'redis',                           |
+    |                     |                |      'CACHE_REDIS_URL': 'redis://...'}                |
+    |                     |                |                                                       |
+    |                     |                | to share one cache between workers.                   |
+    +---------------------+----------------+-------------------------------------------------------+
     | title_sort_key      | None           | Sort key for reports within a group                   |
     +---------------------+----------------+-------------------------------------------------------+
     | link_endpoints      | None           | Dictionary with mapping endpoint IDs to base-URLs.    |
@@ -176,6 +229,8 @@ def create_app(reports_path, title, debug=None, config=()):
         app_config['auth'] = config['auth']
     if servername_set:
         app_config['server_name'] = config['server_name']
+    if 'cache' in config:
+        app_config['cache'] = config['cache']
 
     app = Flask(__name__)
 
@@ -193,6 +248,9 @@ def create_app(reports_path, title, debug=None, config=()):
     app.register_blueprint(bp_api, url_prefix='/api1')
     app.register_blueprint(bp_prometheus, url_prefix='/metrics')
 
+    if not config['debug']:
+        _precompile_templates(app)
+
     # api2 = API(fsopendir('../../glance/example/reports'))
     # app.register_blueprint(make_ui_blueprint(api2, {'title': 'Other'}), url_prefix='/other')
 
@@ -206,16 +264,14 @@ def create_app(reports_path, title, debug=None, config=()):
 @click.option('option', '-o', multiple=True, help='Options for create_app (see documentation). Values are parsed as YAML.')
 @click.argument('reports_path', default=os.getcwd(), type=click.Path(exists=True, dir_okay=True, resolve_path=True))
 def cli(reports_path=None, title='Reports', debug=False, address=None, port=None, option=()):
-    def parse_value(tup):
-        return tup[0], yaml.load(tup[1])
-    def split_eq(s):
-        return s.split('=')
     launch_address = address if address else '127.0.0.1'
     launch_port = port if port else 5000
     url = 'http://{}:{}/'.format(launch_address, launch_port)
     log.info('Starting web server on {}'.format(url))
     click.launch(url)
-    app_opts = dict(map(compose(parse_value, split_eq), option))
+    # split on the first '=' only, so option values may contain '='
+    app_opts = {key: yaml.load(value, Loader=_YamlLoader)
+                for key, value in (opt.split('=', 1) for opt in option)}
     run(reports_path=reports_path, title=title, debug=debug, address=address, port=port, app_opts=app_opts)
 
 
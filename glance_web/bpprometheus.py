@@ -5,12 +5,14 @@ from __future__ import (absolute_import, division, print_function)
 
 import logging
 
+import cachetools
 from flask import Blueprint, Response
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from prometheus_client.core import CollectorRegistry, GaugeMetricFamily
 from prometheus_client.process_collector import ProcessCollector
+from prometheus_client.samples import Sample
 
-from glance.utils import slugify
+from glance.utils import cached_slugify
 
 
 log = logging.getLogger(__name__)
@@ -19,6 +21,11 @@ log = logging.getLogger(__name__)
 class GlanceCollector(object):
     def __init__(self, api):
         self.api = api
+        # scrapes arrive periodically (and in bursts with HA Prometheus
+        # pairs); within the TTL they are answered from memory instead of
+        # re-walking the report tree
+        self._cached_index = cachetools.cached(
+            cachetools.TTLCache(1, ttl=15))(api.index)
 
     def collect(self):
         family = GaugeMetricFamily(
@@ -31,24 +38,23 @@ class GlanceCollector(object):
             ]
         )
 
-        idx = self.api.index()
+        idx = self._cached_index()
 
-        for rid in sorted(idx.keys()):
-            info = idx[rid]
-
-            group = slugify(info['group'])
-            report = slugify(rid)
+        # Prometheus doesn't care about label order, so skip the per-scrape
+        # sort and key materialization; appending Sample tuples directly
+        # also skips the add_metric call and label zip per metric
+        samples = family.samples
+        metric_name = family.name
+        for rid, info in idx.items():
+            group = cached_slugify(info['group'])
+            report = cached_slugify(rid)
 
             for status, count in info['status'].items():
-                status = str(status)
-                family.add_metric(
-                    labels=[
-                        group,
-                        report,
-                        status,
-                    ],
-                    value=count,
-                )
+                samples.append(Sample(
+                    metric_name,
+                    {'group': group, 'report': report, 'status': str(status)},
+                    count,
+                ))
 
         yield family
 
@@ -61,7 +67,7 @@ def make_prometheus_blueprint(api, name, prefix=''):
     registry.register(GlanceCollector(api))
 
     blueprint = Blueprint(
-        'metrics-' + slugify(name), __name__,
+        'metrics-' + cached_slugify(name), __name__,
         url_prefix=prefix,
     )
 
@@ -3,11 +3,11 @@
 
 from __future__ import (absolute_import, division, print_function)
 
-from operator import itemgetter
 
 import six
 from six import BytesIO
 import os.path
+from collections import Counter
 
 import flask
 import jinja2
@@ -20,7 +20,7 @@ from flask import (Blueprint, session, abort, url_for, current_app)
 from jinja2 import evalcontextfilter, Markup
 
 import glance.constants
-from glance.utils import slugify
+from glance.utils import cached_slugify, slugify
 from glance.storage import check_and_repair
 from glance.report import plugin_static_paths, plugin_template_paths, plugin_static_links
 
@@ -28,92 +28,121 @@ from .._utils import templated, mime_from_filepointer
 
 log = logging.getLogger(__name__)
 
+# resolved once at import time: resource_filename walks the package metadata
+# and the plugin loaders never change after plugin registration
+_STATIC_FOLDER = pkg_resources.resource_filename(__name__, 'static')
+_TEMPLATE_FOLDER = pkg_resources.resource_filename(__name__, 'templates')
+_PLUGIN_LOADERS = [jinja2.FileSystemLoader(tmpl_path)
+                   for tmpl_path in plugin_template_paths]
 
-def make_ui_blueprint(api, title, link_endpoints=None, sidebar_status=False):
-    """Create a flask Blueprint for a report Web front-end.
-
-    :param api: (:) API-object for a report root
-    """
 
-    if link_endpoints is None:
-        link_endpoints = ()
+def _per_request(name, fn):
+    """Memoize a zero-argument callable on ``flask.g`` for one request.
 
-    log.info('creating blueprint "{}"'.format(__name__))
-    blueprint = Blueprint(
-        'ui-' + slugify(title), __name__,
-        static_url_path='/uistatic',
-        static_folder=pkg_resources.resource_filename(__name__, 'static'),
-        template_folder=pkg_resources.resource_filename(__name__, 'templates'),
-    )
-
-    # If there are plugins providing additional templates, add template
-    # loaders for them here. Could probably also be done while the server
-    # is running, so new plugins would be usable without restart.
-    loaders = [jinja2.FileSystemLoader(tmpl_path)
-               for tmpl_path in plugin_template_paths]
-    blueprint.jinja_loader = jinja2.ChoiceLoader([blueprint.jinja_loader] + loaders)
+    The report list and groups are asked for several times while building a
+    single page; within one request the first answer is good for all of
+    them."""
+    def cached():
+        try:
+            cache = flask.g._glance_request_cache
+        except AttributeError:
+            cache = flask.g._glance_request_cache = {}
+        if name not in cache:
+            cache[name] = fn()
+        return cache[name]
+    return cached
+
+
+def datetimeformat(value, format='%d-%m-%Y %H:%M'):
+    try:
+        formatted = value.strftime(format)
+    except ValueError:
+        formatted = '-'
+    return formatted
+
+
+@evalcontextfilter
+def nl2br(eval_ctx, value):
+    if '\n' not in value:
+        # nothing to replace — skip the copy for single-line content
+        return value
+    result = value.replace('\n', '<br>\n')
+    if eval_ctx.autoescape:
+        result = Markup(result)
+    return result
+
+
+class _UIBlueprint(object):
+    """Route implementations for the report UI.
+
+    The routes used to be closures inside :func:`make_ui_blueprint`; binding
+    the API and the per-blueprint caches to an instance keeps the hot route
+    bodies on plain attribute lookups and gives derived structures (the
+    per-request caches, the rendered static links) a natural home.
+    """
 
-    @blueprint.context_processor
-    def inject_definitions():
+    def __init__(self, api, title, link_endpoints, sidebar_status):
+        self.api = api
+        self.title = title
+        self.link_endpoints = link_endpoints
+        self.sidebar_status = sidebar_status
+        self.list_reports = _per_request(
+            'list_reports-{}'.format(id(api)), api.list_reports)
+        self.report_groups = _per_request(
+            'report_groups-{}'.format(id(api)), api.report_groups)
+        # url_for needs a request context, so the link HTML can't be built
+        # here; it is built on the first render and reused — the plugin set
+        # (and the blueprint mount point) doesn't change while the app runs
+        self._static_links = None
+
+    def static_links(self):
+        if self._static_links is None:
+            self._static_links = [link_to_html(link)
+                                  for link in plugin_static_links]
+        return self._static_links
+
+    def inject_definitions(self):
         return {
             'session': session,
             'now': datetime.now,
             'constants': glance.constants,
             'general': {
-                'name': title,
-                'sidebar_status': sidebar_status,
+                'name': self.title,
+                'sidebar_status': self.sidebar_status,
             },
             'reportdata': {
-                'reportlist': api.list_reports(),
-                'reportinfo': api.reportinfo,
-                'reports': api.reports,
+                'reportlist': self.list_reports(),
+                'reportinfo': self.api.reportinfo,
+                'reports': self.api.reports,
             },
-            'static_links': list(map(link_to_html, plugin_static_links)),
-            'link_endpoints': link_endpoints,
+            'static_links': self.static_links(),
+            'link_endpoints': self.link_endpoints,
             'version': {
                 'glance': glance.core.__version__,
                 'glance-web': glance.web.__version__,
             },
         }
 
-    blueprint.add_app_template_filter(slugify, 'slugify')
-
-    @blueprint.app_template_filter('datetimeformat')
-    def datetimeformat(value, format='%d-%m-%Y %H:%M'):
-        try:
-            formatted = value.strftime(format)
-        except ValueError:
-            formatted = '-'
-        return formatted
-
-    @blueprint.app_template_filter
-    @evalcontextfilter
-    def nl2br(eval_ctx, value):
-        result = value.replace('\n', '<br>\n')
-        if eval_ctx.autoescape:
-            result = Markup(result)
-        return result
-
-    @blueprint.route('/')
-    @templated('index.html')
-    def index():
-        reports = api.index()
-        groups = api.report_groups()
+    def index(self):
+        reports = self.api.index()
+        groups = self.report_groups()
         return {'reports': reports, 'report_groups': groups}
 
-    @blueprint.route('/reports/<reportid>/')
-    @blueprint.route('/reports/<reportid>/<runid>')
-    @blueprint.route('/reports/<reportid>/<runid>/<int:blockind>')
-    @templated('report_page.html')
-    def report_page(reportid, runid=None, blockind=None):
-        if reportid not in api.list_reports():
+    def report_page(self, reportid, runid=None, blockind=None):
+        api = self.api
+        if reportid not in self.list_reports():
             return abort(404)
 
+        # look the info entry up once; every [] on the TTL-backed reportinfo
+        # cache is a fresh lookup that may even re-read storage on expiry
+        reportinfo = api.reportinfo
+        info = reportinfo[reportid]
+
         if runid in (None, 'latest'):
-            runid = api.reportinfo[reportid]['latest']
+            runid = info['latest']
             log.info('"latest" is "{}"'.format(runid))
 
-        runlist = api.reportinfo[reportid]['runs']
+        runlist = info['runs']
         timesorted = sorted(runlist.values(), key=lambda v: v['timestamp'], reverse=True)
 
         if (runid not in runlist) and (len(runlist) > 0):
@@ -133,27 +162,33 @@ def make_ui_blueprint(api, title, link_endpoints=None, sidebar_status=False):
                 '{}/{} seems to be damaged. See server log for details.'.format(reportid, runid))
             return flask.redirect(flask.request.referrer)
 
-        _setup_tags(current_report)
+        tags = _setup_tags(current_report)
 
         if current_report is None:
             log.debug('Check/repair missing index entries')
             check_and_repair(api.storage, reportid)
 
-        reportnavdata = [
-            {'reportid': thereport,
-             'shorttitle': api.reportinfo[thereport]['shorttitle'],
-             'url': flask.url_for('.report_page', reportid=thereport, runid=runid),
-             'label': api.reportinfo[thereport]['title'],
-             'is_current': (thereport == reportid),
-             } for thereport in sorted(api.list_reports())]
+        reportnavdata = []
+        for thereport in sorted(self.list_reports()):
+            other_info = reportinfo[thereport]
+            reportnavdata.append(
+                {'reportid': thereport,
+                 'shorttitle': other_info['shorttitle'],
+                 'url': flask.url_for('.report_page', reportid=thereport, runid=runid),
+                 'label': other_info['title'],
+                 'is_current': (thereport == reportid),
+                 })
         runnavdata = [
             {'url': flask.url_for('.report_page', reportid=reportid,
                                   runid=rundata['runid'], blockind=blockind),
              'label': rundata['runtitle'],
              } for rundata in timesorted]
+        # one url_for instead of one per block: the blockind route only
+        # appends '/<int>' to the run URL, and url_for walks the whole URL
+        # map each call, which dominates on reports with many blocks
+        block_url_base = flask.url_for('.report_page', reportid=reportid, runid=runid)
         blocknavdata = [
-            {'url': flask.url_for('.report_page', reportid=reportid, runid=runid,
-                                  blockind=seq_index),
+            {'url': '{}/{}'.format(block_url_base, seq_index),
              'label': label, 'section_index': sind, 'block_index': bind,
              } for sind, bind, seq_index, label in current_report.iter_blocks(with_all_indices=True)]
 
@@ -162,52 +197,50 @@ def make_ui_blueprint(api, title, link_endpoints=None, sidebar_status=False):
             sind = blocknavdata[blockind]['section_index']
             bind = blocknavdata[blockind]['block_index']
             current_block = current_report.sections[sind].blocks[bind]
-        timesorted_index = list(map(itemgetter('runid'), timesorted)).index(runid)
+        timesorted_index = {rundata['runid']: i
+                            for i, rundata in enumerate(timesorted)}[runid]
 
         current = {
-            'report_groups': api.report_groups(),
-            'report': api.reports[reportid][runid],
+            'report_groups': self.report_groups(),
+            'report': current_report,
             'blockindex': blockind,
             'reportid': reportid,
             'runid': runid,
             'runnavdata': runnavdata,
             'runindex': timesorted_index,
             'reportnavdata': reportnavdata,
-            'reportindex': api.list_reports().index(reportid),
+            'reportindex': self.list_reports().index(reportid),
             'blocknavdata': blocknavdata,
             'block': current_block,
         }
         return {
             'current': current,
-            'tags': _setup_tags(api.reports[reportid][runid]),
+            'tags': tags,
         }
 
-    @blueprint.route('/<reportid>/<runid>/data-export/csv/<resid>')
-    def data_export(reportid, runid, resid):
-        report = api.reports[reportid][runid]
+    def data_export(self, reportid, runid, resid):
+        report = self.api.reports[reportid][runid]
         isec, iblk, ires = map(int, resid.split('-'))
         res = report.get_element(isec, iblk, ires)
         if getattr(res, 'allow_data_export', False):
             filename = '{}-{}-{}.csv'.format(reportid, runid, resid)
-            return flask.send_file(
-                BytesIO(res.export_data()),
+            # serve the bytes directly; wrapping them in BytesIO for
+            # send_file would copy the whole export once more
+            return flask.Response(
+                res.export_data(),
                 mimetype='text/csv',
-                add_etags=False,
-                as_attachment=True,
-                attachment_filename=filename)
+                headers={'Content-Disposition':
+                         'attachment; filename={}'.format(filename)})
 
-    @blueprint.route('/<reportid>/<runid>/data-export/json/<resid>.json')
-    def data_export_json(reportid, runid, resid):
-        report = api.reports[reportid][runid]
+    def data_export_json(self, reportid, runid, resid):
+        report = self.api.reports[reportid][runid]
         isec, iblk, ires = map(int, resid.split('-'))
         res = report.get_element(isec, iblk, ires)
         current_app.logger.info(str(res))
         return res.export_json()
 
-    @blueprint.route('/<reportid>/<runid>/resources/<filename>')  # pre-3 file format
-    @blueprint.route('/<reportid>/<runid>/resource/<key>/<filename>')
-    def report_resource(reportid, runid, filename=None, key=None):
-        current_report = api.reports[reportid][runid]
+    def report_resource(self, reportid, runid, filename=None, key=None):
+        current_report = self.api.reports[reportid][runid]
         if key is not None:
             try:
                 res = current_report._resources[key]['data']
@@ -218,6 +251,9 @@ def make_ui_blueprint(api, title, link_endpoints=None, sidebar_status=False):
                 # potentially an issue during py2->py3 migration
                 # 'raw_unicode_escape' is used by pickle so we reverse the wrong pickle type
                 res = res.encode('raw_unicode_escape')
+                # the report object is cached by the API; keep the decoded
+                # bytes so this full copy happens once, not per request
+                current_report._resources[key]['data'] = res
 
             fp = BytesIO(res)
             mime = mime_from_filepointer(fp)
@@ -229,7 +265,7 @@ def make_ui_blueprint(api, title, link_endpoints=None, sidebar_status=False):
             )
         else:
             respath = os.path.join(reportid, runid, 'resources', filename)
-            fp = api.storage.open(respath, mode='rb')
+            fp = self.api.storage.open(respath, mode='rb')
             mime = mime_from_filepointer(fp)
             return flask.send_file(
                 fp,
@@ -237,55 +273,101 @@ def make_ui_blueprint(api, title, link_endpoints=None, sidebar_status=False):
                 mimetype=mime,
             )
 
-    @blueprint.route('/bokehstatic/<path:filename>')
-    def bokehstatic(filename):
+    def bokehstatic(self, filename):
         return flask.send_from_directory(bokehjsdir(), filename)
 
-    # Plugin support
-
-    @blueprint.route('/plugin/<plugin>/<path:filename>')
-    def plugin_static(plugin, filename):
+    def plugin_static(self, plugin, filename):
         try:
             path = plugin_static_paths[plugin]
             return flask.send_from_directory(path, filename)
         except KeyError:
             flask.abort(404)
 
-    return blueprint
 
+def make_ui_blueprint(api, title, link_endpoints=None, sidebar_status=False):
+    """Create a flask Blueprint for a report Web front-end.
 
-def _set_status_tags(report):
-    for section in report.sections:
-        for block in section.blocks:
-            status_tag = glance.constants.status_names.get(block.status, None)
-            if status_tag is not None:
-                if (block.tags == []) or (status_tag != 'No Tag'):
-                    if status_tag not in block.tags:
-                        block.tags += [status_tag]
+    :param api: (:) API-object for a report root
+    """
+
+    if link_endpoints is None:
+        link_endpoints = ()
+
+    log.info('creating blueprint "{}"'.format(__name__))
+    blueprint = Blueprint(
+        'ui-' + cached_slugify(title), __name__,
+        static_url_path='/uistatic',
+        static_folder=_STATIC_FOLDER,
+        template_folder=_TEMPLATE_FOLDER,
+    )
+
+    # If there are plugins providing additional templates, add template
+    # loaders for them here. Could probably also be done while the server
+    # is running, so new plugins would be usable without restart.
+    blueprint.jinja_loader = jinja2.ChoiceLoader(
+        [blueprint.jinja_loader] + _PLUGIN_LOADERS)
+
+    ui = _UIBlueprint(api, title, link_endpoints, sidebar_status)
+
+    blueprint.context_processor(ui.inject_definitions)
+
+    # the filters are module-level functions shared by all blueprints; with
+    # one blueprint per API root, re-registering them on every
+    # make_ui_blueprint call would rebind the same names on the app
+    def _register_filters(state):
+        filters = state.app.jinja_env.filters
+        filters.setdefault('slugify', cached_slugify)
+        filters.setdefault('datetimeformat', datetimeformat)
+        filters.setdefault('nl2br', nl2br)
+    blueprint.record_once(_register_filters)
+
+    blueprint.add_url_rule('/', 'index', templated('index.html')(ui.index))
+
+    report_page = templated('report_page.html')(ui.report_page)
+    blueprint.add_url_rule('/reports/<reportid>/', 'report_page', report_page)
+    blueprint.add_url_rule('/reports/<reportid>/<runid>', 'report_page', report_page)
+    blueprint.add_url_rule('/reports/<reportid>/<runid>/<int:blockind>',
+                           'report_page', report_page)
+
+    blueprint.add_url_rule('/<reportid>/<runid>/data-export/csv/<resid>',
+                           'data_export', ui.data_export)
+    blueprint.add_url_rule('/<reportid>/<runid>/data-export/json/<resid>.json',
+                           'data_export_json', ui.data_export_json)
+    # the resources route serves the pre-3 file format
+    blueprint.add_url_rule('/<reportid>/<runid>/resources/<filename>',
+                           'report_resource', ui.report_resource)
+    blueprint.add_url_rule('/<reportid>/<runid>/resource/<key>/<filename>',
+                           'report_resource', ui.report_resource)
+    blueprint.add_url_rule('/bokehstatic/<path:filename>', 'bokehstatic', ui.bokehstatic)
+
+    # Plugin support
+    blueprint.add_url_rule('/plugin/<plugin>/<path:filename>',
+                           'plugin_static', ui.plugin_static)
+
+    return blueprint
 
 
 def _get_all_tags(report):
     """:return list of all unique tags used in the report
        :return dict of number of blocks with each tag
     """
-    _set_status_tags(report)
-    counter = {'All': 0}
-    for status_name in glance.constants.status_names.values():
-        # set up counters for default filters
-        counter[status_name] = 0
-
+    status_names = glance.constants.status_names
+    # set up counters for default filters; large reports have thousands of
+    # blocks, so tag the blocks and count their tags in one traversal
+    counter = Counter({status_name: 0 for status_name in status_names.values()})
+    nblocks = 0
     for section in report.sections:
         for block in section.blocks:
-            for tag in block.tags:
-                if tag not in counter:
-                    counter[tag] = 0
-                counter[tag] += 1
-            counter['All'] += 1
-    tags = list(counter.keys())
-    tags.remove('All')
-    tagids = {}
-    for tag in tags:
-        tagids[tag] = slugify(tag)
+            status_tag = status_names.get(block.status, None)
+            if status_tag is not None:
+                if (block.tags == []) or (status_tag != 'No Tag'):
+                    if status_tag not in block.tags:
+                        block.tags += [status_tag]
+            counter.update(block.tags)
+            nblocks += 1
+    counter['All'] = nblocks
+    tags = [tag for tag in counter if tag != 'All']
+    tagids = {tag: cached_slugify(tag) for tag in tags}
     return tags, tagids, counter
 
 
@@ -324,19 +406,10 @@ def _find_closest_run(api, reportid, runid=None):
                       str(src_timestamp))
 
     runlist = api.reportinfo[reportid]['runs']
-    timesorted = sorted(runlist.values(), key=lambda v: v['timestamp'])
-
-    closest = timesorted[-1]
     log.debug('looking for run in %s with timestamp closest to %s', reportid,
               str(src_timestamp))
-    for therun in api.reportinfo[reportid]['runs'].values():
-        if abs(src_timestamp - therun['timestamp']) < abs(src_timestamp - closest['timestamp']):
-            log.debug('run %s is closer with timestamp %s', therun['runid'],
-                      str(therun['timestamp']))
-            closest = therun
-        else:
-            log.debug('run %s is not closer with timestamp %s', therun['runid'],
-                      str(therun['timestamp']))
+    closest = min(runlist.values(),
+                  key=lambda therun: abs(src_timestamp - therun['timestamp']))
 
     closest_runid = closest['runid']
     log.debug('found runid %s', closest_runid)